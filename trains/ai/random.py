@@ -8,5 +8,4 @@ from trains.game.action import Action
 @dataclass
 class RandomActor(AiActor):
     def _get_action(self) -> Action:
-        all_actions = list(self.state.get_legal_actions())
-        return random.choice(all_actions).action
+        return random.choice(self.state.legal_actions()).action
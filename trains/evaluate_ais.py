@@ -14,6 +14,8 @@ from trains.ai.utility_function import (
 )
 from trains.game.box import Player, Box
 from trains.game.game_actor import play_game, SimulatedGameActor
+from trains.game.known_state import KnownState
+from trains.game.observed_state import ObservedState
 
 AiMaker = Callable[[Box, Player], AiActor]
 BoxMaker = Callable[[List[Player]], Box]
@@ -120,6 +122,11 @@ def play_ais(
         a_scores += game.scores[a_player]
         b_scores += game.scores[b_player]
 
+        # the states of a finished game won't come up again, so they aren't kept
+        # around for the rest of the run
+        KnownState.clear_caches()
+        ObservedState.clear_caches()
+
         pbar.update()  # type: ignore
 
     return a_wins / games, a_scores / games, b_wins / games, b_scores / games
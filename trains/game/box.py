@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import operator
 import uuid
+import weakref
 from collections import defaultdict
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
 from typing import (
     FrozenSet,
+    Iterable,
+    Iterator,
+    Mapping,
     Optional,
     List,
     Tuple,
@@ -12,8 +18,10 @@ from typing import (
     Set,
     DefaultDict,
     TypeVar,
+    Union,
 )
 
+import numpy as np
 from frozendict import frozendict
 
 from trains.mypy_util import cache, add_slots
@@ -25,6 +33,20 @@ class Color:
     name: str
 
 
+# Colors are shared between all boxes, rather than allocating new ones for every route
+# and deck
+_COLOR_CACHE: Dict[str, Color] = {}
+
+
+def _color(name: Optional[str]) -> Optional[Color]:
+    if not name:
+        return None
+    color = _COLOR_CACHE.get(name)
+    if color is None:
+        color = _COLOR_CACHE[name] = Color(name)
+    return color
+
+
 @add_slots
 @dataclass(frozen=True)
 class Player:
@@ -44,6 +66,36 @@ class Route:
     color: Optional[Color]  # None represents a gray route (any color can be used)
     length: int
     id: uuid.UUID = field(default_factory=lambda: uuid.uuid4())
+    # the position of the route in its board's route_list, so that per-route state can
+    # be kept in lists instead of dicts keyed by route
+    index: int = field(default=-1, compare=False, repr=False)
+    # the two cities of the route in a fixed order, so that finding the other end of a
+    # route does not need any set operations
+    _endpoints: Tuple[City, City] = field(init=False, compare=False, repr=False)
+    # how the route is shown to users
+    display: str = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        city_a, city_b = self.cities
+        object.__setattr__(self, "_endpoints", (city_a, city_b))
+        object.__setattr__(
+            self,
+            "display",
+            f"{'grey' if self.color is None else self.color.name} route from {city_a.name} to {city_b.name}",
+        )
+
+
+@add_slots
+@dataclass(frozen=True)
+class _RouteArrays:
+    """
+    The hot per-route data of a board laid out as parallel arrays. Entry i describes
+    board.route_list[i], and cities are given as indices into board.city_list.
+    """
+
+    lengths: np.ndarray
+    city_a: np.ndarray
+    city_b: np.ndarray
 
 
 @add_slots
@@ -51,21 +103,73 @@ class Route:
 class Board:
     cities: FrozenSet[City]
     routes: FrozenSet[Route]
-    double_routes: frozendict[Route, FrozenSet[Route]]
+    # double_routes is derived from routes, and a mapping proxy can't be hashed
+    double_routes: Mapping[Route, FrozenSet[Route]] = field(compare=False)
+    # fixed orderings of the cities and routes, used to index into _routes_soa
+    city_list: Tuple[City, ...] = field(compare=False)
+    route_list: Tuple[Route, ...] = field(compare=False)
+    # memoized values of the derived properties below, filled in on first access
+    # (add_slots drops class level defaults, so these are cleared in __post_init__)
+    _city_indices_cached: Optional[Mapping[City, int]] = field(
+        init=False, compare=False, repr=False
+    )
+    _routes_soa_cached: Optional[_RouteArrays] = field(
+        init=False, compare=False, repr=False
+    )
+    _cities_to_routes_cached: Optional[
+        DefaultDict[FrozenSet[City], List[Route]]
+    ] = field(init=False, compare=False, repr=False)
+    _city_pairs_cached: Optional[Mapping[Tuple[City, City], FrozenSet[City]]] = field(
+        init=False, compare=False, repr=False
+    )
+    _cities_to_routes_by_color_cached: Optional[
+        Mapping[FrozenSet[City], Mapping[Optional[Color], Route]]
+    ] = field(init=False, compare=False, repr=False)
+    _shortest_paths_cached: Optional[Mapping[FrozenSet[City], int]] = field(
+        init=False, compare=False, repr=False
+    )
+    _routes_from_city_cached: Optional[
+        Mapping[City, FrozenSet[Tuple[City, Route]]]
+    ] = field(init=False, compare=False, repr=False)
+    _routes_by_max_length_cached: Optional[Tuple[Tuple[Route, ...], ...]] = field(
+        init=False, compare=False, repr=False
+    )
+    _double_route_masks_cached: Optional[Tuple[int, ...]] = field(
+        init=False, compare=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_routes_by_max_length_cached", None)
+        object.__setattr__(self, "_city_indices_cached", None)
+        object.__setattr__(self, "_routes_soa_cached", None)
+        object.__setattr__(self, "_cities_to_routes_cached", None)
+        object.__setattr__(self, "_cities_to_routes_by_color_cached", None)
+        object.__setattr__(self, "_city_pairs_cached", None)
+        object.__setattr__(self, "_shortest_paths_cached", None)
+        object.__setattr__(self, "_routes_from_city_cached", None)
+        object.__setattr__(self, "_double_route_masks_cached", None)
+        # per-route state is kept in lists and masks indexed by route.index, so a
+        # route out of place would silently share another route's entry
+        for index, route in enumerate(self.route_list):
+            if route.index != index:
+                raise ValueError(
+                    f"{route.display} has index {route.index} but is at position "
+                    f"{index} of the board's route_list"
+                )
 
     @classmethod
     def make(cls, routes: List[Tuple[str, str, Optional[str], int]]) -> Board:
         cities = {
             city_name: City(city_name) for route in routes for city_name in route[0:2]
         }
-        colors = {color: Color(color) if color else None for _, _, color, _ in routes}
         board_routes = [
             Route(
                 cities=frozenset((cities[city1], cities[city2])),
-                color=colors[color],
+                color=_color(color),
                 length=length,
+                index=index,
             )
-            for city1, city2, color, length in routes
+            for index, (city1, city2, color, length) in enumerate(routes)
         ]
 
         routes_by_cities: Dict[FrozenSet[City], Set[Route]] = {
@@ -81,58 +185,194 @@ class Board:
         return Board(
             cities=frozenset(cities.values()),
             routes=frozenset(board_routes),
-            double_routes=frozendict(double_routes),
+            double_routes=MappingProxyType(double_routes),
+            city_list=tuple(cities.values()),
+            route_list=tuple(board_routes),
         )
 
-    @property  # type: ignore
-    @cache
+    @property
+    def city_indices(self) -> Mapping[City, int]:
+        """
+        The position of each city in city_list
+        """
+        value = self._city_indices_cached
+        if value is None:
+            value = MappingProxyType({city: i for i, city in enumerate(self.city_list)})
+            object.__setattr__(self, "_city_indices_cached", value)
+        return value
+
+    @property
+    def _routes_soa(self) -> _RouteArrays:
+        value = self._routes_soa_cached
+        if value is None:
+            value = self._make_routes_soa()
+            object.__setattr__(self, "_routes_soa_cached", value)
+        return value
+
+    def _make_routes_soa(self) -> _RouteArrays:
+        city_indices = self.city_indices
+        endpoints = [route._endpoints for route in self.route_list]
+        return _RouteArrays(
+            lengths=np.array(
+                [route.length for route in self.route_list], dtype=np.int16
+            ),
+            city_a=np.array([city_indices[a] for a, _ in endpoints], dtype=np.int16),
+            city_b=np.array([city_indices[b] for _, b in endpoints], dtype=np.int16),
+        )
+
+    @property
     def cities_to_routes(self) -> DefaultDict[FrozenSet[City], List[Route]]:
+        value = self._cities_to_routes_cached
+        if value is None:
+            value = self._make_cities_to_routes()
+            object.__setattr__(self, "_cities_to_routes_cached", value)
+        return value
+
+    def _make_cities_to_routes(self) -> DefaultDict[FrozenSet[City], List[Route]]:
         d = defaultdict(list)
         for route in self.routes:
             d[route.cities].append(route)
         return d
 
+    @property
+    def city_pairs(self) -> Mapping[Tuple[City, City], FrozenSet[City]]:
+        """
+        The cities of the routes, keyed by the two cities in either order. The values
+        are the routes' own sets of cities, so looking them up in the other mappings
+        keyed by cities is quicker than with a newly made set.
+        """
+        value = self._city_pairs_cached
+        if value is None:
+            value = MappingProxyType(
+                {
+                    pair: route.cities
+                    for route in self.route_list
+                    for pair in (route._endpoints, route._endpoints[::-1])
+                }
+            )
+            object.__setattr__(self, "_city_pairs_cached", value)
+        return value
+
+    @property
+    def cities_to_routes_by_color(
+        self,
+    ) -> Mapping[FrozenSet[City], Mapping[Optional[Color], Route]]:
+        """
+        The routes between each pair of cities, keyed by their color (None for gray). If
+        parallel routes have the same color, the first in route_list is kept.
+        """
+        value = self._cities_to_routes_by_color_cached
+        if value is None:
+            value = self._make_cities_to_routes_by_color()
+            object.__setattr__(self, "_cities_to_routes_by_color_cached", value)
+        return value
+
+    def _make_cities_to_routes_by_color(
+        self,
+    ) -> Mapping[FrozenSet[City], Mapping[Optional[Color], Route]]:
+        d: Dict[FrozenSet[City], Dict[Optional[Color], Route]] = {}
+        for route in self.route_list:
+            d.setdefault(route.cities, {}).setdefault(route.color, route)
+        return MappingProxyType(
+            {cities: MappingProxyType(routes) for cities, routes in d.items()}
+        )
+
     def shortest_path(self, from_city: City, to_city: City) -> int:
         if from_city == to_city:
             return 0
         else:
             return self.shortest_paths[frozenset([from_city, to_city])]
 
-    @property  # type: ignore
-    @cache
-    def shortest_paths(self) -> frozendict[FrozenSet[City], int]:
-        # compute the shortest paths for all pairs of cities using Floyd-Warshal
+    @property
+    def shortest_paths(self) -> Mapping[FrozenSet[City], int]:
+        value = self._shortest_paths_cached
+        if value is None:
+            value = self._make_shortest_paths()
+            object.__setattr__(self, "_shortest_paths_cached", value)
+        return value
+
+    def _make_shortest_paths(self) -> Mapping[FrozenSet[City], int]:
+        # compute the shortest paths for all pairs of cities using Floyd-Warshal, on a
+        # distance matrix indexed like city_list
 
-        costs = {route.cities: route.length for route in self.routes}
+        soa = self._routes_soa
+        costs = np.full((len(self.city_list),) * 2, np.inf)
+        # parallel routes may have different lengths, so keep the shortest of them
+        np.minimum.at(costs, (soa.city_a, soa.city_b), soa.lengths)
+        np.minimum.at(costs, (soa.city_b, soa.city_a), soa.lengths)
 
-        for city_k in self.cities:
-            for city_i in self.cities:
-                for city_j in self.cities:
-                    if city_i != city_j and city_i != city_k and city_j != city_k:
-                        i_k = frozenset([city_i, city_k])
-                        k_j = frozenset([city_k, city_j])
-                        i_j = frozenset([city_i, city_j])
-                        if i_k in costs and k_j in costs:
-                            if i_j not in costs or costs[i_k] + costs[k_j] < costs[i_j]:
-                                costs[i_j] = costs[i_k] + costs[k_j]
+        for k in range(len(self.city_list)):
+            np.minimum(
+                costs, costs[:, k, np.newaxis] + costs[np.newaxis, k, :], out=costs
+            )
 
-        return frozendict(costs)
+        return MappingProxyType(
+            {
+                frozenset([city_i, city_j]): int(costs[i, j])
+                for i, city_i in enumerate(self.city_list)
+                for j, city_j in enumerate(self.city_list[i + 1 :], start=i + 1)
+                if costs[i, j] != np.inf
+            }
+        )
 
     def routes_from_city(self, city: City) -> FrozenSet[Tuple[City, Route]]:
         return self._routes_from_city[city]
 
-    @property  # type: ignore
-    @cache
-    def _routes_from_city(self) -> frozendict[City, FrozenSet[Tuple[City, Route]]]:
+    @property
+    def _routes_from_city(self) -> Mapping[City, FrozenSet[Tuple[City, Route]]]:
+        value = self._routes_from_city_cached
+        if value is None:
+            value = self._make_routes_from_city()
+            object.__setattr__(self, "_routes_from_city_cached", value)
+        return value
+
+    def _make_routes_from_city(self) -> Mapping[City, FrozenSet[Tuple[City, Route]]]:
         city_to_routes: Dict[City, List[Tuple[City, Route]]] = {
-            city: [] for city in self.cities
+            city: [] for city in self.city_list
         }
-        for route in self.routes:
-            for city in route.cities:
-                city_to_routes[city].append((list(route.cities - {city})[0], route))
+        for route in self.route_list:
+            city_a, city_b = route._endpoints
+            city_to_routes[city_a].append((city_b, route))
+            city_to_routes[city_b].append((city_a, route))
+
+        return MappingProxyType(
+            {city: frozenset(routes) for city, routes in city_to_routes.items()}
+        )
+
+    @property
+    def double_route_masks(self) -> Tuple[int, ...]:
+        """
+        For each route index, a mask with bit i set for each of its double routes of
+        index i
+        """
+        value = self._double_route_masks_cached
+        if value is None:
+            masks = [0] * (max((route.index for route in self.routes), default=-1) + 1)
+            for route, doubles in self.double_routes.items():
+                for double in doubles:
+                    masks[route.index] |= 1 << double.index
+            value = tuple(masks)
+            object.__setattr__(self, "_double_route_masks_cached", value)
+        return value
+
+    def routes_up_to_length(self, length: int) -> Tuple[Route, ...]:
+        """
+        Get the routes that are no longer than the given length, in the same order as
+        iterating over routes
+        """
+        routes_by_max_length = self._routes_by_max_length_cached
+        if routes_by_max_length is None:
+            routes_by_max_length = self._make_routes_by_max_length()
+            object.__setattr__(
+                self, "_routes_by_max_length_cached", routes_by_max_length
+            )
+        return routes_by_max_length[max(min(length, len(routes_by_max_length) - 1), 0)]
 
-        return frozendict(
-            (city, frozenset(routes)) for city, routes in city_to_routes.items()
+    def _make_routes_by_max_length(self) -> Tuple[Tuple[Route, ...], ...]:
+        longest = max((route.length for route in self.routes), default=0)
+        return tuple(
+            tuple(route for route in self.routes if route.length <= max_length)
+            for max_length in range(longest + 1)
         )
 
 
@@ -142,6 +382,23 @@ class DestinationCard:
     cities: FrozenSet[City]
     value: int
     id: uuid.UUID = field(default_factory=lambda: uuid.uuid4())
+    _hash_cached: int = field(init=False, compare=False, repr=False)
+    # how the card is shown to users
+    display: str = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self, "_hash_cached", hash((self.cities, self.value, self.id))
+        )
+        city_a, city_b = self.cities
+        object.__setattr__(
+            self, "display", f"{city_a.name}->{city_b.name} for {self.value}"
+        )
+
+    def __hash__(self) -> int:
+        # cards are hashed every time a set of them is built, which the destination
+        # card deals and selections do for every combination of cards
+        return self._hash_cached
 
     @property
     def cities_list(self) -> List[City]:
@@ -157,11 +414,83 @@ TrainCard = Optional[Color]  # None represents a wildcard
 _TrainCard = TypeVar("_TrainCard", bound=TrainCard)  # needed because mypy is stupid
 
 
-class TrainCards(frozendict[TrainCard, int]):
-    @property  # type: ignore
-    @cache
-    def total(self) -> int:
-        return sum(self.values())
+# every kind of train card gets a small dense index, shared by all boxes, which is used
+# to lay out the counts of a TrainCards
+_CARD_INDICES: Dict[TrainCard, int] = {None: 0}
+_INDEXED_CARDS: List[TrainCard] = [None]
+
+
+def _card_index(card: TrainCard) -> int:
+    index = _CARD_INDICES.get(card)
+    if index is None:
+        index = _CARD_INDICES[card] = len(_INDEXED_CARDS)
+        _INDEXED_CARDS.append(card)
+    return index
+
+
+class TrainCards(Mapping[TrainCard, int]):
+    """
+    An immutable multiset of train cards. The counts are stored as a tuple indexed by
+    card index, without trailing zeros, so that equal multisets have equal tuples.
+    Cards with a count of zero are not part of the mapping.
+
+    Args:
+        cards: The count of each card
+    """
+
+    __slots__ = ("counts", "total", "__weakref__")
+
+    counts: Tuple[int, ...]
+    total: int
+
+    def __init__(
+        self,
+        cards: Union[Mapping[_TrainCard, int], Iterable[Tuple[_TrainCard, int]]] = (),
+    ):
+        counts: List[int] = []
+        for card, count in cards.items() if isinstance(cards, Mapping) else cards:
+            index = _card_index(card)
+            if index >= len(counts):
+                counts.extend([0] * (index + 1 - len(counts)))
+            counts[index] = count
+        self._set_counts(counts)
+
+    @classmethod
+    def from_counts(cls, counts: Iterable[int]) -> TrainCards:
+        """
+        Make a TrainCards from counts laid out by card index. Equal multisets made this
+        way are the same object, so comparing them (e.g. when they are used as keys)
+        stops at the identity check.
+        """
+        counts_list = list(counts)
+        while counts_list and counts_list[-1] == 0:
+            counts_list.pop()
+        key = tuple(counts_list)
+        train_cards = _interned_train_cards.get(key)
+        if train_cards is None:
+            train_cards = cls.__new__(cls)
+            train_cards.counts = key
+            train_cards.total = sum(key)
+            _interned_train_cards[key] = train_cards
+        return train_cards
+
+    @classmethod
+    def of_card(cls, card: TrainCard, count: int, wildcards: int = 0) -> TrainCards:
+        """
+        Make a TrainCards holding count of the given card, plus the given number of
+        wildcards
+        """
+        index = _card_index(card)
+        counts = [0] * (index + 1)
+        counts[0] = wildcards
+        counts[index] += count
+        return cls.from_counts(counts)
+
+    def _set_counts(self, counts: List[int]) -> None:
+        while counts and counts[-1] == 0:
+            counts.pop()
+        self.counts = tuple(counts)
+        self.total = sum(counts)
 
     @property  # type: ignore
     @cache
@@ -171,17 +500,64 @@ class TrainCards(frozendict[TrainCard, int]):
         )
 
     def replacing(self, key: TrainCard, value: int) -> TrainCards:
-        train_cards = dict(self)
-        train_cards[key] = value
-        return TrainCards(train_cards)
+        return self.incrementing(key, value - self[key])
 
     def incrementing(self, key: TrainCard, value: int) -> TrainCards:
-        train_cards = defaultdict(int, self)
-        train_cards[key] += value
-        return TrainCards(train_cards)
+        counts = list(self.counts)
+        index = _card_index(key)
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += value
+        return TrainCards.from_counts(counts)
+
+    def subtracting(self, other: TrainCards) -> TrainCards:
+        """
+        Remove the other cards from this multiset. Cards that aren't in this multiset
+        are ignored; use subtract_train_cards to also find out which those were.
+        """
+        counts = list(self.counts)
+        for index, count in enumerate(other.counts[: len(counts)]):
+            counts[index] = max(counts[index] - count, 0)
+        return TrainCards.from_counts(counts)
+
+    def issubset(self, other: TrainCards) -> bool:
+        """
+        Determine if every card in this multiset is also in the other one
+        """
+        return len(self.counts) <= len(other.counts) and all(
+            map(operator.le, self.counts, other.counts)
+        )
 
     def __getitem__(self, item: TrainCard) -> int:
-        return super().get(item, 0)
+        index = _CARD_INDICES.get(item)
+        if index is None or index >= len(self.counts):
+            return 0
+        return self.counts[index]
+
+    def __contains__(self, item: object) -> bool:
+        return self[item] != 0  # type: ignore
+
+    def __iter__(self) -> Iterator[TrainCard]:
+        return (_INDEXED_CARDS[i] for i, count in enumerate(self.counts) if count)
+
+    def __len__(self) -> int:
+        return len(self.counts) - self.counts.count(0)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TrainCards):
+            return self.counts == other.counts
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return hash(self.counts)
+
+    def __repr__(self) -> str:
+        return f"TrainCards({dict(self)!r})"
+
+
+_interned_train_cards: weakref.WeakValueDictionary[
+    Tuple[int, ...], TrainCards
+] = weakref.WeakValueDictionary()
 
 
 @add_slots
@@ -229,17 +605,140 @@ class Box:
     wildcards_to_clear: int
     face_up_train_cards: int
     route_point_values: frozendict[int, int]
+    _next_player_map_cached: Optional[Dict[Player, Player]] = field(
+        init=False, compare=False, repr=False
+    )
+    _colors_cached: Optional[FrozenSet[Color]] = field(
+        init=False, compare=False, repr=False
+    )
+    _color_display_cached: Optional[Mapping[Optional[Color], str]] = field(
+        init=False, compare=False, repr=False
+    )
+    _player_indices_cached: Optional[Mapping[Player, int]] = field(
+        init=False, compare=False, repr=False
+    )
+    _destination_card_list_cached: Optional[Tuple[DestinationCard, ...]] = field(
+        init=False, compare=False, repr=False
+    )
+    _destination_card_bits_cached: Optional[Mapping[DestinationCard, int]] = field(
+        init=False, compare=False, repr=False
+    )
+    _hash_cached: Optional[int] = field(init=False, compare=False, repr=False)
 
-    @property  # type: ignore
-    @cache
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_next_player_map_cached", None)
+        object.__setattr__(self, "_colors_cached", None)
+        object.__setattr__(self, "_color_display_cached", None)
+        object.__setattr__(self, "_player_indices_cached", None)
+        object.__setattr__(self, "_destination_card_list_cached", None)
+        object.__setattr__(self, "_destination_card_bits_cached", None)
+        object.__setattr__(self, "_hash_cached", None)
+
+    def __hash__(self) -> int:
+        # the box is part of every state, so it gets hashed whenever a state does
+        value = self._hash_cached
+        if value is None:
+            value = hash(
+                tuple(getattr(self, f.name) for f in fields(self) if f.compare)
+            )
+            object.__setattr__(self, "_hash_cached", value)
+        return value
+
+    @property
     def next_player_map(self) -> Dict[Player, Player]:
+        value = self._next_player_map_cached
+        if value is None:
+            value = self._make_next_player_map()
+            object.__setattr__(self, "_next_player_map_cached", value)
+        return value
+
+    def _make_next_player_map(self) -> Dict[Player, Player]:
         return dict(zip(self.players, self.players[1:] + self.players[:1]))
 
-    @property  # type: ignore
-    @cache
+    @property
+    def player_indices(self) -> Mapping[Player, int]:
+        """
+        The position of each player in players
+        """
+        value = self._player_indices_cached
+        if value is None:
+            value = MappingProxyType(
+                {player: index for index, player in enumerate(self.players)}
+            )
+            object.__setattr__(self, "_player_indices_cached", value)
+        return value
+
+    @property
+    def destination_card_list(self) -> Tuple[DestinationCard, ...]:
+        """
+        The destination cards in a fixed order. Card i of the list is represented by
+        bit i of a destination card mask.
+        """
+        value = self._destination_card_list_cached
+        if value is None:
+            value = tuple(self.destination_cards)
+            object.__setattr__(self, "_destination_card_list_cached", value)
+        return value
+
+    @property
+    def destination_card_bits(self) -> Mapping[DestinationCard, int]:
+        """
+        The bit representing each destination card in a destination card mask
+        """
+        value = self._destination_card_bits_cached
+        if value is None:
+            value = MappingProxyType(
+                {
+                    card: 1 << index
+                    for index, card in enumerate(self.destination_card_list)
+                }
+            )
+            object.__setattr__(self, "_destination_card_bits_cached", value)
+        return value
+
+    def destination_card_mask(self, cards: Iterable[DestinationCard]) -> int:
+        bits = self.destination_card_bits
+        mask = 0
+        for card in cards:
+            mask |= bits[card]
+        return mask
+
+    def destination_cards_of_mask(self, mask: int) -> FrozenSet[DestinationCard]:
+        card_list = self.destination_card_list
+        cards = []
+        while mask:
+            lowest_bit = mask & -mask
+            cards.append(card_list[lowest_bit.bit_length() - 1])
+            mask ^= lowest_bit
+        return frozenset(cards)
+
+    @property
     def colors(self) -> FrozenSet[Color]:
+        value = self._colors_cached
+        if value is None:
+            value = self._make_colors()
+            object.__setattr__(self, "_colors_cached", value)
+        return value
+
+    def _make_colors(self) -> FrozenSet[Color]:
         return frozenset(self.train_cards.keys()) - {None}  # type: ignore
 
+    @property
+    def color_display(self) -> Mapping[Optional[Color], str]:
+        """
+        How each kind of train card is shown to users, with None shown as a wildcard
+        """
+        value = self._color_display_cached
+        if value is None:
+            value = MappingProxyType(
+                {
+                    color: "wildcard" if color is None else color.name
+                    for color in self.train_cards.keys()
+                }
+            )
+            object.__setattr__(self, "_color_display_cached", value)
+        return value
+
     @classmethod
     def standard(cls, players: List[Player]) -> Box:
         return Box(
@@ -384,14 +883,14 @@ class Box:
             ),
             train_cards=TrainCards(
                 {
-                    Color("pink"): 12,
-                    Color("white"): 12,
-                    Color("blue"): 12,
-                    Color("yellow"): 12,
-                    Color("orange"): 12,
-                    Color("black"): 12,
-                    Color("red"): 12,
-                    Color("green"): 12,
+                    _color("pink"): 12,
+                    _color("white"): 12,
+                    _color("blue"): 12,
+                    _color("yellow"): 12,
+                    _color("orange"): 12,
+                    _color("black"): 12,
+                    _color("red"): 12,
+                    _color("green"): 12,
                     None: 14,
                 }
             ),
@@ -442,7 +941,7 @@ class Box:
                     DestinationCard.make("E", "F", 2),
                 ]
             ),
-            train_cards=TrainCards({Color("red"): 10, Color("blue"): 10, None: 8}),
+            train_cards=TrainCards({_color("red"): 10, _color("blue"): 10, None: 8}),
             starting_train_count=3,
             starting_destination_cards_range=(1, 2),
             dealt_destination_cards_range=(1, 2),
@@ -529,12 +1028,12 @@ class Box:
             ),
             train_cards=TrainCards(
                 {
-                    Color("blue"): 6,
-                    Color("green"): 6,
-                    Color("black"): 6,
-                    Color("pink"): 6,
-                    Color("red"): 6,
-                    Color("orange"): 6,
+                    _color("blue"): 6,
+                    _color("green"): 6,
+                    _color("black"): 6,
+                    _color("pink"): 6,
+                    _color("red"): 6,
+                    _color("orange"): 6,
                     None: 8,
                 }
             ),
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import FrozenSet, Any
+from typing import FrozenSet, Any, Optional, Mapping, Dict
 
 from frozendict import frozendict
 
@@ -11,10 +11,16 @@ class Clusters:
     def __init__(
         self,
         clusters: FrozenSet[FrozenSet[City]],
-        distances: frozendict[FrozenSet[City], int],
+        distances: Mapping[FrozenSet[City], int],
+        city_to_cluster: Optional[frozendict[City, FrozenSet[City]]] = None,
     ):
         self.clusters = clusters
         self.distances = distances
+        if city_to_cluster is None:
+            city_to_cluster = frozendict(
+                (city, cluster) for cluster in clusters for city in cluster
+            )
+        self._city_to_cluster = city_to_cluster
 
     def __eq__(self, other: Any) -> bool:
         return isinstance(other, Clusters) and self.clusters == other.clusters
@@ -24,38 +30,53 @@ class Clusters:
 
     def connect(self, a: City, b: City) -> Clusters:
         cities = frozenset([a, b])
-        clusters = []
-        clusters_to_merge = []
-        for cluster in self.clusters:
-            if not cities.isdisjoint(cluster):
-                clusters_to_merge.append(cluster)
-            else:
-                clusters.append(cluster)
+        clusters_to_merge = {
+            self._city_to_cluster[city]
+            for city in cities
+            if city in self._city_to_cluster
+        }
 
         new_cluster = cities.union(*clusters_to_merge)
-        clusters.append(new_cluster)
+        clusters = self.clusters.difference(clusters_to_merge).union([new_cluster])
+        city_to_cluster = dict(self._city_to_cluster)
+        city_to_cluster.update((city, new_cluster) for city in new_cluster)
 
         # see https://cs.stackexchange.com/a/76850 for reasoning behind how new
         # distances are calculated
-        new_distances = frozendict(
-            (
-                frozenset([s, t]),
-                min(
-                    old_distance,
-                    self.distance(s, a) + self.distance(b, t),
-                    self.distance(s, b) + self.distance(a, t),
-                ),
-            )
-            for edge, (s, t), old_distance in (
-                (edge, edge, old_distance)
-                for edge, old_distance in self.distances.items()
+        distances = self.distances
+        # the distances from every city to a and to b, gathered in one pass so that the
+        # loop below doesn't need to build and hash pairs of cities for every edge
+        to_a: Dict[City, int] = {a: 0}
+        to_b: Dict[City, int] = {b: 0}
+        for edge, distance in distances.items():
+            s, t = edge
+            if s == a:
+                to_a[t] = distance
+            elif t == a:
+                to_a[s] = distance
+            if s == b:
+                to_b[t] = distance
+            elif t == b:
+                to_b[s] = distance
+
+        new_distances = {}
+        for edge, old_distance in distances.items():
+            s, t = edge
+            new_distances[edge] = min(
+                old_distance, to_a[s] + to_b[t], to_b[s] + to_a[t]
             )
-        )
 
-        return Clusters(frozenset(clusters), frozendict(new_distances))
+        return Clusters(
+            clusters, frozendict(new_distances), frozendict(city_to_cluster)
+        )
 
     def is_connected(self, cities: FrozenSet[City]) -> bool:
-        return any(cities.issubset(cluster) for cluster in self.clusters)
+        # connected cities all share a single cluster, so looking up the cluster of any
+        # one of them is enough to check the rest
+        for city in cities:
+            cluster = self._city_to_cluster.get(city)
+            return cluster is not None and cities <= cluster
+        return False
 
     def distance(self, from_city: City, to_city: City) -> int:
         if from_city == to_city:
@@ -64,7 +85,4 @@ class Clusters:
             return self.distances[frozenset([from_city, to_city])]
 
     def get_cluster_for_city(self, city: City) -> FrozenSet[City]:
-        for cluster in self.clusters:
-            if city in cluster:
-                return cluster
-        return frozenset([city])
+        return self._city_to_cluster.get(city, frozenset([city]))
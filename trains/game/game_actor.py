@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import itertools
 import random
 from abc import ABC
-from collections import defaultdict
-from dataclasses import dataclass
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
 from typing import (
+    Any,
+    Callable,
+    ClassVar,
     Dict,
     List,
     Set,
@@ -12,6 +16,8 @@ from typing import (
     Union,
     FrozenSet,
     Iterable,
+    Tuple,
+    Deque,
     DefaultDict,
 )
 
@@ -29,7 +35,6 @@ from trains.game.box import (
     TrainCards,
     frozendict,
 )
-from trains.game.clusters import Clusters
 from trains.game.player_actor import PlayerActor
 from trains.game.turn import TurnState
 from trains.mypy_util import assert_never
@@ -40,6 +45,32 @@ from trains.util import (
 )
 
 
+def _unexpected_action_message(action: Action) -> str:
+    return f"unexpected action type {type(action)}"
+
+
+def _expand_train_cards(cards: TrainCards) -> List[TrainCard]:
+    """
+    List out every individual card in the given train cards
+    """
+    return list(
+        itertools.chain.from_iterable(
+            itertools.repeat(card, count) for card, count in cards.items()
+        )
+    )
+
+
+def _find_root(parents: List[int], i: int) -> int:
+    """
+    Find the root of i in a union-find forest given by parent pointers, compressing
+    the path along the way
+    """
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
 @dataclass  # type: ignore
 class GameActor(Actor, ABC):
     """
@@ -60,325 +91,446 @@ class GameActor(Actor, ABC):
     discarded_train_cards: TrainCards
     built_routes: Dict[Route, Player]
     turn_state: TurnState
+    # running counts of the cards held by players, so that checking whether the decks
+    # are empty doesn't need to go through every hand
+    _destination_cards_in_hands: int = field(init=False, repr=False)
+    _train_cards_in_hands: int = field(init=False, repr=False)
+    # the index in box.players of the owner of each route, by the route's index, or -1
+    # if the route is unbuilt. This mirrors built_routes for the validation checks.
+    _route_owners: List[int] = field(init=False, repr=False)
+    # the points each player has scored from building routes, by the player's index
+    _route_points: List[int] = field(init=False, repr=False)
+    # for each player, a union-find forest over the indices of the cities on the board
+    # that records which cities the player's routes connect
+    _city_parents: DefaultDict[Player, List[int]] = field(init=False, repr=False)
+    # the scores as of the last call to scores, or None if they may have changed since
+    _scores: Optional[Dict[Player, int]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._destination_cards_in_hands = sum(
+            len(hand.destination_cards) + len(hand.unselected_destination_cards)
+            for hand in self.player_hands.values()
+        )
+        self._train_cards_in_hands = sum(
+            hand.train_cards.total for hand in self.player_hands.values()
+        )
+        self._scores = None
+        self._route_owners = [-1] * len(self.box.board.route_list)
+        self._route_points = [0] * len(self.box.players)
+        city_count = len(self.box.board.city_list)
+        self._city_parents = defaultdict(lambda: list(range(city_count)))
+        for route, player in self.built_routes.items():
+            self._add_built_route(route, player)
+
+    def _add_built_route(self, route: Route, player: Player) -> None:
+        self._scores = None
+        player_index = self.box.player_indices[player]
+        self._route_owners[route.index] = player_index
+        self._route_points[player_index] += self.box.route_point_values[route.length]
+        city_indices = self.box.board.city_indices
+        parents = self._city_parents[player]
+        city_a, city_b = route.cities
+        parents[_find_root(parents, city_indices[city_a])] = _find_root(
+            parents, city_indices[city_b]
+        )
 
     def validate_action(self, action: Action) -> Optional[str]:
-        unexpected_action_message = f"unexpected action type {type(action)}"
-
-        def verify_train_draw(
-            action: gaction.TrainCardPickAction, second: bool = False
-        ) -> Optional[str]:
-            if action.draw_known:
-                if self.face_up_train_cards[action.selected_card_if_known] <= 0:
-                    return "There are no face up cards of the given color"
-            else:
-                if self._train_card_deck_empty:
-                    return "There are no train cards left to draw"
-            if second and action.draw_known and action.selected_card_if_known is None:
-                return "Cannot select wildcard on second draw"
+        validator = self._validators.get((type(self.turn_state), type(action)))
+        if validator is None:
+            return _unexpected_action_message(action)
+        return validator(self, self.turn_state, action)
+
+    def observe_action(self, action: Action) -> None:
+        self.turn_state = self._record_action(action)
+
+    def _record_action(self, action: Action) -> TurnState:
+        recorder = self._recorders.get((type(self.turn_state), type(action)))
+        if recorder is None:
+            raise TrainsException(_unexpected_action_message(action))
+        return recorder(self, self.turn_state, action)
+
+    def _accept(self, turn_state: TurnState, action: Action) -> Optional[str]:
+        return None
+
+    def _validate_train_draw(
+        self, action: gaction.TrainCardPickAction, second: bool
+    ) -> Optional[str]:
+        if action.draw_known:
+            if self.face_up_train_cards[action.selected_card_if_known] <= 0:
+                return "There are no face up cards of the given color"
+        else:
+            if self._train_card_deck_empty:
+                return "There are no train cards left to draw"
+        if second and action.draw_known and action.selected_card_if_known is None:
+            return "Cannot select wildcard on second draw"
+        return None
+
+    def _validate_destination_selection(
+        self,
+        turn_state: gturn.PlayerTurn,
+        action: gaction.DestinationCardSelectionAction,
+        min_cards: int,
+    ) -> Optional[str]:
+        if len(action.selected_cards) < min_cards:
+            return f"Number of selected destination cards must be at least {min_cards}"
+        if not action.selected_cards.issubset(
+            self.player_hands[turn_state.player].unselected_destination_cards
+        ):
+            return f"Selected destination cards are not valid"
+        else:
             return None
 
-        def verify_destination_pick(
-            turn_state: gturn.PlayerTurn,
-            min_cards: int,
-        ) -> Optional[str]:
-            if isinstance(action, gaction.DestinationCardSelectionAction):
-                if len(action.selected_cards) < min_cards:
-                    return f"Number of selected destination cards must be at least {min_cards}"
-                if not action.selected_cards.issubset(
-                    self.player_hands[turn_state.player].unselected_destination_cards
-                ):
-                    return f"Selected destination cards are not valid"
-                else:
-                    return None
-            else:
-                return unexpected_action_message
+    def _validate_initial_destination_selection(
+        self,
+        turn_state: gturn.PlayerInitialDestinationCardChoiceTurn,
+        action: gaction.DestinationCardSelectionAction,
+    ) -> Optional[str]:
+        return self._validate_destination_selection(
+            turn_state, action, self.box.starting_destination_cards_range[0]
+        )
 
-        if isinstance(self.turn_state, gturn.PlayerInitialDestinationCardChoiceTurn):
-            return verify_destination_pick(
-                self.turn_state, self.box.starting_destination_cards_range[0]
-            )
-        elif isinstance(self.turn_state, gturn.PlayerStartTurn):
-            if isinstance(action, gaction.PassAction):
-                return None
-            elif isinstance(action, gaction.BuildAction):
-                if action.route in self.built_routes:
-                    return "Route is already built"
-                if len(
-                    self.box.players
-                ) < self.box.double_routes_player_minimum and any(
-                    double_route in self.built_routes
-                    for double_route in self.box.board.double_routes[action.route]
-                ):
-                    return f"Cannot build double routes in games with less than {self.box.double_routes_player_minimum} players"
-                if any(
-                    self.built_routes.get(double_route, None) == self.turn_state.player
-                    for double_route in self.box.board.double_routes[action.route]
-                ):
-                    return "Cannot build route. You cannot build two routes next to each other"
-                if not sufficient_cards_to_build(
-                    action.route, action.train_cards
-                ) or not all(
-                    count
-                    <= self.player_hands[self.turn_state.player].train_cards[color]
-                    for color, count in action.train_cards.items()
-                ):
-                    return "Not enough train cards to build route"
-                if (
-                    self.player_hands[self.turn_state.player].remaining_trains
-                    < action.route.length
-                ):
-                    return "Not enough trains to build route"
-                return None
-            elif isinstance(action, gaction.TrainCardPickAction):
-                return verify_train_draw(action)
-            elif isinstance(action, gaction.DestinationCardPickAction):
-                if self._destination_card_deck_empty:
-                    return "There are no destination cards left to draw"
-                else:
-                    return None
-            else:
-                return unexpected_action_message
-        elif isinstance(self.turn_state, gturn.PlayerTrainCardDrawMidTurn):
-            if isinstance(action, gaction.TrainCardPickAction):
-                return verify_train_draw(action, second=True)
-            else:
-                return unexpected_action_message
-        elif isinstance(self.turn_state, gturn.PlayerDestinationCardDrawMidTurn):
-            return verify_destination_pick(
-                self.turn_state, self.box.dealt_destination_cards_range[0]
-            )
-        elif isinstance(self.turn_state, gturn.DestinationCardDealTurn):
-            if isinstance(action, gaction.DestinationCardDealAction):
-                return None
-            else:
-                return unexpected_action_message
-        elif isinstance(self.turn_state, gturn.TrainCardDealTurn):
-            if isinstance(action, gaction.TrainCardDealAction):
-                return None
-            else:
-                return unexpected_action_message
-        elif isinstance(self.turn_state, gturn.GameOverTurn):
-            if isinstance(action, gaction.PassAction):
-                return None
-            else:
-                return unexpected_action_message
-        elif isinstance(self.turn_state, gturn.InitialTurn):
-            if isinstance(action, gaction.InitialDealAction):
-                return None
-            else:
-                return unexpected_action_message
-        elif isinstance(self.turn_state, gturn.RevealFinalDestinationCardsTurn):
-            if isinstance(action, gaction.RevealFinalDestinationCardsAction):
-                return None
-            else:
-                return unexpected_action_message
+    def _validate_dealt_destination_selection(
+        self,
+        turn_state: gturn.PlayerDestinationCardDrawMidTurn,
+        action: gaction.DestinationCardSelectionAction,
+    ) -> Optional[str]:
+        return self._validate_destination_selection(
+            turn_state, action, self.box.dealt_destination_cards_range[0]
+        )
+
+    def _validate_build(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.BuildAction
+    ) -> Optional[str]:
+        route = action.route
+        route_owners = self._route_owners
+        box = self.box
+        if route_owners[route.index] >= 0:
+            return "Route is already built"
+        double_routes = box.board.double_routes[route]
+        if len(box.players) < box.double_routes_player_minimum and any(
+            route_owners[double_route.index] >= 0 for double_route in double_routes
+        ):
+            return f"Cannot build double routes in games with less than {box.double_routes_player_minimum} players"
+        player = turn_state.player
+        player_index = box.player_indices[player]
+        if any(
+            route_owners[double_route.index] == player_index
+            for double_route in double_routes
+        ):
+            return "Cannot build route. You cannot build two routes next to each other"
+        hand = self.player_hands[player]
+        if not sufficient_cards_to_build(
+            route, action.train_cards
+        ) or not action.train_cards.issubset(hand.train_cards):
+            return "Not enough train cards to build route"
+        if hand.remaining_trains < route.length:
+            return "Not enough trains to build route"
+        return None
+
+    def _validate_first_train_card_pick(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.TrainCardPickAction
+    ) -> Optional[str]:
+        return self._validate_train_draw(action, second=False)
+
+    def _validate_second_train_card_pick(
+        self,
+        turn_state: gturn.PlayerTrainCardDrawMidTurn,
+        action: gaction.TrainCardPickAction,
+    ) -> Optional[str]:
+        return self._validate_train_draw(action, second=True)
+
+    def _validate_destination_card_pick(
+        self,
+        turn_state: gturn.PlayerStartTurn,
+        action: gaction.DestinationCardPickAction,
+    ) -> Optional[str]:
+        if self._destination_card_deck_empty:
+            return "There are no destination cards left to draw"
         else:
-            assert_never(self.turn_state)
+            return None
 
-    def observe_action(self, action: Action) -> None:
-        self.turn_state = self._record_action(action)
+    def _perform_train_draw(
+        self,
+        turn_state: Union[gturn.PlayerStartTurn, gturn.PlayerTrainCardDrawMidTurn],
+        action: gaction.TrainCardPickAction,
+    ) -> None:
+        if action.draw_known:
+            card = action.selected_card_if_known
+            hand = self.player_hands[turn_state.player]
+            hand.train_cards = hand.train_cards.incrementing(card, 1)
+            self._train_cards_in_hands += 1
+            self.face_up_train_cards = self.face_up_train_cards.incrementing(card, -1)
+
+    def _last_turn_started(self, turn_state: gturn.PlayerStartTurn) -> bool:
+        return (
+            turn_state.last_turn_started
+            or self.player_hands[turn_state.player].remaining_trains
+            <= self.box.trains_to_end
+        )
 
-    def _record_action(self, action: Action) -> TurnState:
-        unexpected_action_error = TrainsException(
-            f"unexpected action type {type(action)}"
+    def _record_initial_destination_selection(
+        self,
+        turn_state: gturn.PlayerInitialDestinationCardChoiceTurn,
+        action: gaction.DestinationCardSelectionAction,
+    ) -> TurnState:
+        player = turn_state.player
+        hand = self.player_hands[player]
+        self._return_unselected_destination_cards(hand, action.selected_cards)
+        hand.destination_cards = set(action.selected_cards)
+        self._scores = None
+        next_player = self.box.next_player_map[player]
+        if next_player == self.box.players[0]:
+            return gturn.PlayerStartTurn(last_turn_started=False, player=next_player)
+        else:
+            return gturn.PlayerInitialDestinationCardChoiceTurn(next_player)
+
+    def _return_unselected_destination_cards(
+        self, hand: PlayerHand, selected_cards: FrozenSet[DestinationCard]
+    ) -> None:
+        """
+        Clear the hand's dealt destination cards, recycling the ones that were not
+        selected. The selection must already have been validated as a subset of the
+        dealt cards, so the number of recycled cards is known without building the
+        difference, which is skipped entirely when every card is kept.
+        """
+        unselected_cards = hand.unselected_destination_cards
+        recycled_count = len(unselected_cards) - len(selected_cards)
+        if recycled_count > 0:
+            self._destination_cards_in_hands -= recycled_count
+            self._recycle_destination_cards(unselected_cards - selected_cards)
+        hand.unselected_destination_cards = frozenset()
+
+    def _record_pass(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.PassAction
+    ) -> TurnState:
+        return gturn.PlayerStartTurn.make_or_end(
+            self._last_turn_started(turn_state),
+            self.box.next_player_map[turn_state.player],
         )
 
-        def perform_train_draw(
-            turn_state: Union[gturn.PlayerStartTurn, gturn.PlayerTrainCardDrawMidTurn],
-            action: gaction.TrainCardPickAction,
-        ) -> None:
-            if action.draw_known:
-                self.player_hands[turn_state.player].train_cards = self.player_hands[
-                    turn_state.player
-                ].train_cards.incrementing(action.selected_card_if_known, 1)
-                self.face_up_train_cards = self.face_up_train_cards.incrementing(
-                    action.selected_card_if_known, -1
-                )
+    def _record_build(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.BuildAction
+    ) -> TurnState:
+        player = turn_state.player
+        hand = self.player_hands[player]
+        route = action.route
+        train_cards = action.train_cards
+        last_turn_started = self._last_turn_started(turn_state)
+        self.built_routes[route] = player
+        self._add_built_route(route, player)
+        hand.remaining_trains -= route.length
+        hand.train_cards = subtract_train_cards(hand.train_cards, train_cards)[0]
+        self._train_cards_in_hands -= train_cards.total
+        self.discarded_train_cards = merge_train_cards(
+            self.discarded_train_cards, train_cards
+        )
 
-        if isinstance(self.turn_state, gturn.PlayerInitialDestinationCardChoiceTurn):
-            if isinstance(action, gaction.DestinationCardSelectionAction):
-                self._recycle_destination_cards(
-                    self.player_hands[
-                        self.turn_state.player
-                    ].unselected_destination_cards
-                    - action.selected_cards
-                )
-                self.player_hands[self.turn_state.player].destination_cards = set(
-                    action.selected_cards
-                )
-                self.player_hands[
-                    self.turn_state.player
-                ].unselected_destination_cards = frozenset()
-                next_player = self.box.next_player_map[self.turn_state.player]
-                if next_player == self.box.players[0]:
-                    return gturn.PlayerStartTurn(
-                        last_turn_started=False, player=next_player
-                    )
-                else:
-                    return gturn.PlayerInitialDestinationCardChoiceTurn(next_player)
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.PlayerStartTurn):
-            last_turn_started = (
-                self.turn_state.last_turn_started
-                or self.player_hands[self.turn_state.player].remaining_trains
-                <= self.box.trains_to_end
+        return gturn.PlayerStartTurn.make_or_end(
+            last_turn_started,
+            self.box.next_player_map[player],
+        )
+
+    def _record_first_train_card_pick(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.TrainCardPickAction
+    ) -> TurnState:
+        player = turn_state.player
+        draw_known = action.draw_known
+        last_turn_started = self._last_turn_started(turn_state)
+        self._perform_train_draw(turn_state, action)
+        if draw_known and action.selected_card_if_known is None:
+            next_turn_state: TurnState = gturn.PlayerStartTurn.make_or_end(
+                last_turn_started,
+                self.box.next_player_map[player],
             )
-            if isinstance(action, gaction.PassAction):
-                return gturn.PlayerStartTurn.make_or_end(
-                    last_turn_started,
-                    self.box.next_player_map[self.turn_state.player],
-                )
-            elif isinstance(action, gaction.BuildAction):
-                self.built_routes[action.route] = self.turn_state.player
-                self.player_hands[
-                    self.turn_state.player
-                ].remaining_trains -= action.route.length
-                self.player_hands[
-                    self.turn_state.player
-                ].train_cards = subtract_train_cards(
-                    self.player_hands[self.turn_state.player].train_cards,
-                    action.train_cards,
-                )[
-                    0
-                ]
-                self.discarded_train_cards = merge_train_cards(
-                    self.discarded_train_cards, action.train_cards
-                )
+        else:
+            next_turn_state = gturn.PlayerTrainCardDrawMidTurn(
+                last_turn_started, player
+            )
+        return gturn.TrainCardDealTurn(
+            count=1,
+            to_player=None if draw_known else player,
+            next_turn_state=next_turn_state,
+        )
 
-                return gturn.PlayerStartTurn.make_or_end(
-                    last_turn_started,
-                    self.box.next_player_map[self.turn_state.player],
-                )
-            elif isinstance(action, gaction.TrainCardPickAction):
-                perform_train_draw(self.turn_state, action)
-                if action.draw_known and action.selected_card_if_known is None:
-                    next_turn_state: TurnState = gturn.PlayerStartTurn.make_or_end(
-                        last_turn_started,
-                        self.box.next_player_map[self.turn_state.player],
-                    )
-                else:
-                    next_turn_state = gturn.PlayerTrainCardDrawMidTurn(
-                        last_turn_started, self.turn_state.player
-                    )
-                return gturn.TrainCardDealTurn(
-                    count=1,
-                    to_player=None if action.draw_known else self.turn_state.player,
-                    next_turn_state=next_turn_state,
-                )
-            elif isinstance(action, gaction.DestinationCardPickAction):
-                return gturn.DestinationCardDealTurn(
-                    last_turn_started, self.turn_state.player
-                )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.PlayerTrainCardDrawMidTurn):
-            if isinstance(action, gaction.TrainCardPickAction):
-                perform_train_draw(self.turn_state, action)
+    def _record_destination_card_pick(
+        self,
+        turn_state: gturn.PlayerStartTurn,
+        action: gaction.DestinationCardPickAction,
+    ) -> TurnState:
+        return gturn.DestinationCardDealTurn(
+            self._last_turn_started(turn_state), turn_state.player
+        )
+
+    def _record_second_train_card_pick(
+        self,
+        turn_state: gturn.PlayerTrainCardDrawMidTurn,
+        action: gaction.TrainCardPickAction,
+    ) -> TurnState:
+        self._perform_train_draw(turn_state, action)
+        return gturn.TrainCardDealTurn(
+            count=1,
+            to_player=None if action.draw_known else turn_state.player,
+            next_turn_state=gturn.PlayerStartTurn.make_or_end(
+                turn_state.last_turn_started,
+                self.box.next_player_map[turn_state.player],
+            ),
+        )
+
+    def _record_dealt_destination_selection(
+        self,
+        turn_state: gturn.PlayerDestinationCardDrawMidTurn,
+        action: gaction.DestinationCardSelectionAction,
+    ) -> TurnState:
+        player = turn_state.player
+        hand = self.player_hands[player]
+        self._return_unselected_destination_cards(hand, action.selected_cards)
+        hand.destination_cards.update(action.selected_cards)
+        self._scores = None
+        return gturn.PlayerStartTurn.make_or_end(
+            turn_state.last_turn_started,
+            self.box.next_player_map[player],
+        )
+
+    def _record_destination_card_deal(
+        self,
+        turn_state: gturn.DestinationCardDealTurn,
+        action: gaction.DestinationCardDealAction,
+    ) -> TurnState:
+        hand = self.player_hands[turn_state.to_player]
+        self._destination_cards_in_hands += len(action.cards) - len(
+            hand.unselected_destination_cards
+        )
+        hand.unselected_destination_cards = action.cards
+        return gturn.PlayerDestinationCardDrawMidTurn(
+            turn_state.last_turn_started, turn_state.to_player
+        )
+
+    def _record_train_card_deal(
+        self, turn_state: gturn.TrainCardDealTurn, action: gaction.TrainCardDealAction
+    ) -> TurnState:
+        if turn_state.to_player is None:
+            self.face_up_train_cards = merge_train_cards(
+                self.face_up_train_cards, action.cards
+            )
+            if self.face_up_train_cards[None] >= self.box.wildcards_to_clear:
+                self.face_up_train_cards = TrainCards()
                 return gturn.TrainCardDealTurn(
-                    count=1,
-                    to_player=None if action.draw_known else self.turn_state.player,
-                    next_turn_state=gturn.PlayerStartTurn.make_or_end(
-                        self.turn_state.last_turn_started,
-                        self.box.next_player_map[self.turn_state.player],
-                    ),
+                    count=self.box.face_up_train_cards,
+                    to_player=None,
+                    next_turn_state=turn_state.next_turn_state,
                 )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.PlayerDestinationCardDrawMidTurn):
-            if isinstance(action, gaction.DestinationCardSelectionAction):
-                self._recycle_destination_cards(
-                    self.player_hands[
-                        self.turn_state.player
-                    ].unselected_destination_cards
-                    - action.selected_cards
-                )
-                self.player_hands[self.turn_state.player].destination_cards.update(
-                    action.selected_cards
-                )
-                self.player_hands[
-                    self.turn_state.player
-                ].unselected_destination_cards = frozenset()
-                return gturn.PlayerStartTurn.make_or_end(
-                    self.turn_state.last_turn_started,
-                    self.box.next_player_map[self.turn_state.player],
-                )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.DestinationCardDealTurn):
-            if isinstance(action, gaction.DestinationCardDealAction):
-                self.player_hands[
-                    self.turn_state.to_player
-                ].unselected_destination_cards = action.cards
-                return gturn.PlayerDestinationCardDrawMidTurn(
-                    self.turn_state.last_turn_started, self.turn_state.to_player
-                )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.TrainCardDealTurn):
-            if isinstance(action, gaction.TrainCardDealAction):
-                if self.turn_state.to_player is None:
-                    for card, count in action.cards.items():
-                        self.face_up_train_cards = (
-                            self.face_up_train_cards.incrementing(card, count)
-                        )
-                    if self.face_up_train_cards[None] >= self.box.wildcards_to_clear:
-                        self.face_up_train_cards = TrainCards()
-                        return gturn.TrainCardDealTurn(
-                            count=self.box.face_up_train_cards,
-                            to_player=None,
-                            next_turn_state=self.turn_state.next_turn_state,
-                        )
-                else:
-                    self.player_hands[
-                        self.turn_state.to_player
-                    ].train_cards = merge_train_cards(
-                        self.player_hands[self.turn_state.to_player].train_cards,
-                        action.cards,
-                    )
-                return self.turn_state.next_turn_state
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.GameOverTurn):
-            if isinstance(action, gaction.PassAction):
-                return gturn.GameOverTurn()
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.InitialTurn):
-            if isinstance(action, gaction.InitialDealAction):
-                for player, train_cards in action.train_cards.items():
-                    self.player_hands[player].train_cards = train_cards
-                for player, destination_cards in action.destination_cards.items():
-                    self.player_hands[
-                        player
-                    ].unselected_destination_cards = destination_cards
-                self.face_up_train_cards = merge_train_cards(
-                    self.face_up_train_cards, action.face_up_train_cards
-                )
-                return gturn.PlayerInitialDestinationCardChoiceTurn(self.box.players[0])
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.RevealFinalDestinationCardsTurn):
-            if isinstance(action, gaction.RevealFinalDestinationCardsAction):
-                return gturn.GameOverTurn()
-            else:
-                raise unexpected_action_error
         else:
-            assert_never(self.turn_state)
+            hand = self.player_hands[turn_state.to_player]
+            hand.train_cards = merge_train_cards(hand.train_cards, action.cards)
+            self._train_cards_in_hands += action.cards.total
+        return turn_state.next_turn_state
+
+    def _record_initial_deal(
+        self, turn_state: gturn.InitialTurn, action: gaction.InitialDealAction
+    ) -> TurnState:
+        player_hands = self.player_hands
+        for player, train_cards in action.train_cards.items():
+            hand = player_hands[player]
+            self._train_cards_in_hands += train_cards.total - hand.train_cards.total
+            hand.train_cards = train_cards
+        for player, destination_cards in action.destination_cards.items():
+            hand = player_hands[player]
+            self._destination_cards_in_hands += len(destination_cards) - len(
+                hand.unselected_destination_cards
+            )
+            hand.unselected_destination_cards = destination_cards
+        self.face_up_train_cards = merge_train_cards(
+            self.face_up_train_cards, action.face_up_train_cards
+        )
+        return gturn.PlayerInitialDestinationCardChoiceTurn(self.box.players[0])
+
+    def _record_game_over(self, turn_state: TurnState, action: Action) -> TurnState:
+        return gturn.GameOverTurn()
+
+    # validate_action and _record_action dispatch on the exact types of the turn
+    # state and the action. A pair that is missing from these tables is an
+    # unexpected action.
+    _validators: ClassVar[
+        Dict[Tuple[type, type], Callable[[GameActor, Any, Any], Optional[str]]]
+    ] = {
+        (
+            gturn.PlayerInitialDestinationCardChoiceTurn,
+            gaction.DestinationCardSelectionAction,
+        ): _validate_initial_destination_selection,
+        (gturn.PlayerStartTurn, gaction.PassAction): _accept,
+        (gturn.PlayerStartTurn, gaction.BuildAction): _validate_build,
+        (
+            gturn.PlayerStartTurn,
+            gaction.TrainCardPickAction,
+        ): _validate_first_train_card_pick,
+        (
+            gturn.PlayerStartTurn,
+            gaction.DestinationCardPickAction,
+        ): _validate_destination_card_pick,
+        (
+            gturn.PlayerTrainCardDrawMidTurn,
+            gaction.TrainCardPickAction,
+        ): _validate_second_train_card_pick,
+        (
+            gturn.PlayerDestinationCardDrawMidTurn,
+            gaction.DestinationCardSelectionAction,
+        ): _validate_dealt_destination_selection,
+        (gturn.DestinationCardDealTurn, gaction.DestinationCardDealAction): _accept,
+        (gturn.TrainCardDealTurn, gaction.TrainCardDealAction): _accept,
+        (gturn.GameOverTurn, gaction.PassAction): _accept,
+        (gturn.InitialTurn, gaction.InitialDealAction): _accept,
+        (
+            gturn.RevealFinalDestinationCardsTurn,
+            gaction.RevealFinalDestinationCardsAction,
+        ): _accept,
+    }
+    _recorders: ClassVar[
+        Dict[Tuple[type, type], Callable[[GameActor, Any, Any], TurnState]]
+    ] = {
+        (
+            gturn.PlayerInitialDestinationCardChoiceTurn,
+            gaction.DestinationCardSelectionAction,
+        ): _record_initial_destination_selection,
+        (gturn.PlayerStartTurn, gaction.PassAction): _record_pass,
+        (gturn.PlayerStartTurn, gaction.BuildAction): _record_build,
+        (
+            gturn.PlayerStartTurn,
+            gaction.TrainCardPickAction,
+        ): _record_first_train_card_pick,
+        (
+            gturn.PlayerStartTurn,
+            gaction.DestinationCardPickAction,
+        ): _record_destination_card_pick,
+        (
+            gturn.PlayerTrainCardDrawMidTurn,
+            gaction.TrainCardPickAction,
+        ): _record_second_train_card_pick,
+        (
+            gturn.PlayerDestinationCardDrawMidTurn,
+            gaction.DestinationCardSelectionAction,
+        ): _record_dealt_destination_selection,
+        (
+            gturn.DestinationCardDealTurn,
+            gaction.DestinationCardDealAction,
+        ): _record_destination_card_deal,
+        (gturn.TrainCardDealTurn, gaction.TrainCardDealAction): _record_train_card_deal,
+        (gturn.GameOverTurn, gaction.PassAction): _record_game_over,
+        (gturn.InitialTurn, gaction.InitialDealAction): _record_initial_deal,
+        (
+            gturn.RevealFinalDestinationCardsTurn,
+            gaction.RevealFinalDestinationCardsAction,
+        ): _record_game_over,
+    }
 
     @property
     def _destination_card_deck_empty(self) -> bool:
-        cards_not_in_pile = sum(
-            len(hand.destination_cards) + len(hand.unselected_destination_cards)
-            for hand in self.player_hands.values()
-        )
         deck_size = len(self.box.destination_cards)
-        return deck_size - cards_not_in_pile == 0
+        return deck_size - self._destination_cards_in_hands == 0
 
     @property
     def _train_card_deck_empty(self) -> bool:
         cards_not_in_pile = (
-            sum(hand.train_cards.total for hand in self.player_hands.values())
+            self._train_cards_in_hands
             + len(self.face_up_train_cards)
             + len(self.discarded_train_cards)
         )
@@ -397,29 +549,32 @@ class GameActor(Actor, ABC):
 
     @property
     def scores(self) -> Dict[Player, int]:
-        return {player: self._get_player_score(player) for player in self.box.players}
+        if self._scores is None:
+            self._scores = {
+                player: self._get_player_score(player) for player in self.box.players
+            }
+        return dict(self._scores)
 
     def _get_player_score(self, player: Player) -> int:
         """
         Calculate the player's score from routes and destination cards, along with the
         length of their longest route.
         """
-        built_routes = {
-            route for route, builder in self.built_routes.items() if builder == player
-        }
-        clusters = Clusters(frozenset(), self.box.board.shortest_paths)
-        for route in built_routes:
-            clusters = clusters.connect(*route.cities)
-
-        cards_points = sum(
-            card.value * (1 if clusters.is_connected(card.cities) else -1)
-            for card in self.player_hands[player].destination_cards
-        )
-        routes_points = sum(
-            self.box.route_point_values[route.length] for route in built_routes
-        )
-
-        return cards_points + routes_points
+        city_indices = self.box.board.city_indices
+        parents = self._city_parents[player]
+
+        cards_points = 0
+        for card in self.player_hands[player].destination_cards:
+            city_a, city_b = card.cities
+            index_a = city_indices.get(city_a)
+            index_b = city_indices.get(city_b)
+            connected = (
+                index_a is not None
+                and index_b is not None
+                and _find_root(parents, index_a) == _find_root(parents, index_b)
+            )
+            cards_points += card.value if connected else -card.value
+        return cards_points + self._route_points[self.box.player_indices[player]]
 
 
 @dataclass  # type: ignore
@@ -428,14 +583,12 @@ class SimulatedGameActor(GameActor):
     An implementation of GameActor that simulates the game.
     """
 
-    destination_card_pile: List[DestinationCard]  # last is top of pile
+    destination_card_pile: Deque[DestinationCard]  # last is top of pile
     train_card_pile: List[TrainCard]  # last is top of pile
 
     @staticmethod
     def make(box: Box) -> SimulatedGameActor:
-        train_card_pile = [
-            color for color, count in box.train_cards.items() for _ in range(count)
-        ]
+        train_card_pile = _expand_train_cards(box.train_cards)
         destination_card_pile = list(box.destination_cards)
         random.shuffle(train_card_pile)
         random.shuffle(destination_card_pile)
@@ -454,7 +607,7 @@ class SimulatedGameActor(GameActor):
             face_up_train_cards=TrainCards(),
             discarded_train_cards=TrainCards(),
             built_routes={},
-            destination_card_pile=destination_card_pile,
+            destination_card_pile=deque(destination_card_pile),
             train_card_pile=train_card_pile,
         )
 
@@ -507,22 +660,26 @@ class SimulatedGameActor(GameActor):
             raise TrainsException(f"Unexpected turn state {type(self.turn_state)}")
 
     def _deal_train_cards(self, count: int) -> TrainCards:
-        cards: DefaultDict[TrainCard, int] = defaultdict(int)
-        for _ in range(count):
+        cards: Counter[TrainCard] = Counter()
+        while count > 0:
             if len(self.train_card_pile) == 0:
                 # need to reshuffle deck
                 if len(self.discarded_train_cards) == 0:
                     # there are no train cards left to be drawn
                     break
-                self.train_card_pile = [
-                    card
-                    for card, count in self.discarded_train_cards.items()
-                    for _ in range(count)
-                ]
-                random.shuffle(self.train_card_pile)
-            cards[self.train_card_pile.pop()] += 1
+                self._reshuffle_train_cards()
+            pile = self.train_card_pile
+            start = max(len(pile) - count, 0)
+            # count the cards in the order they come off the top of the pile
+            cards.update(reversed(pile[start:]))
+            count -= len(pile) - start
+            del pile[start:]
         return TrainCards(cards)
 
+    def _reshuffle_train_cards(self) -> None:
+        self.train_card_pile = _expand_train_cards(self.discarded_train_cards)
+        random.shuffle(self.train_card_pile)
+
     def _deal_destination_cards(self, count: int) -> FrozenSet[DestinationCard]:
         destination_cards: List[DestinationCard] = []
         for _ in range(
@@ -535,36 +692,61 @@ class SimulatedGameActor(GameActor):
         return frozenset(destination_cards)
 
     def _recycle_destination_cards(self, cards: Iterable[DestinationCard]) -> None:
-        for card in cards:
-            self.destination_card_pile.insert(0, card)
+        self.destination_card_pile.extendleft(cards)
 
 
 def play_game(
-    players: Dict[Player, PlayerActor], game: GameActor, print_result: bool = True
+    players: Dict[Player, PlayerActor],
+    game: GameActor,
+    print_result: bool = True,
+    validate_game_actions: bool = False,
+    history: Optional[List[Tuple[TurnState, Action]]] = None,
 ) -> Optional[Player]:
+    """
+    Play out a game between the given players.
+
+    Args:
+        players: The actors making the moves for each player
+        game: The actor making the moves for the game
+        print_result: True if the final scores should be printed
+        validate_game_actions: True if the actions produced by the game itself (card
+            deals, e.g.) should be validated like player actions. The game only
+            produces legal actions, so this is off by default.
+        history: If given, every accepted action is appended to this list along with
+            the turn state it was made in
+    """
     actors: List[Actor] = list(players.values()) + [game]  # type: ignore
 
-    history = []
+    # bind everything used in the loop up front, since this is the driver for whole
+    # games played out by the AIs
+    get_game_action = game.get_action
+    get_player_actions = {player: actor.get_action for player, actor in players.items()}
+    player_action_validators = [actor.validate_action for actor in actors]
+    game_action_validators = player_action_validators if validate_game_actions else []
+    observers = [actor.observe_action for actor in actors]
+
     while not game.is_over:
-        if game.turn_state.player is None:
-            action = game.get_action()
+        turn_state = game.turn_state
+        player = turn_state.player
+        if player is None:
+            action = get_game_action()
+            validators = game_action_validators
         else:
-            action = players[game.turn_state.player].get_action()
-
-        error = next(
-            (
-                error
-                for error in (actor.validate_action(action) for actor in actors)
-                if error is not None
-            ),
-            None,
-        )
+            action = get_player_actions[player]()
+            validators = player_action_validators
+
+        error = None
+        for validate in validators:
+            error = validate(action)
+            if error is not None:
+                break
         if error is not None:
             print(f"Error: {error}")
         else:
-            history.append((game.turn_state, action))
-            for actor in actors:
-                actor.observe_action(action)
+            if history is not None:
+                history.append((turn_state, action))
+            for observe in observers:
+                observe(action)
 
     if print_result:
         for player, score in game.scores.items():
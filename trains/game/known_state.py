@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import functools
 import itertools
-from dataclasses import dataclass, replace
+from dataclasses import dataclass, field
 from typing import (
+    Any,
     Callable,
+    ClassVar,
+    Dict,
     Optional,
     FrozenSet,
     Generator,
     Tuple,
-    Dict,
     Union,
     Iterable,
 )
@@ -20,47 +23,92 @@ import trains.game.action as gaction
 import trains.game.turn as gturn
 from trains.error import TrainsException
 from trains.game.action import Action
-from trains.game.box import Player, DestinationCard, Box, TrainCards, Color
+from trains.game.box import (
+    Player,
+    DestinationCard,
+    Box,
+    TrainCards,
+    Color,
+    Route,
+)
 from trains.game.clusters import Clusters
-from trains.game.state import AbstractState, State, KnownHandState
+from trains.game.state import (
+    AbstractState,
+    State,
+    KnownHandState,
+    train_card_draw_legal_actions,
+)
 from trains.game.turn import TurnState
-from trains.mypy_util import assert_never
+from trains.mypy_util import add_slots
 from trains.util import (
-    subtract_train_cards,
+    fast_replace,
     merge_train_cards,
-    Cons,
     probability_of_having_cards,
+    frozendict_set,
+    destination_cards_value,
+)
+
+
+def _unexpected_action_error(action: Action) -> TrainsException:
+    return TrainsException(f"unexpected action type {type(action)}")
+
+
+# legal actions that are the same in every state they come up in, shared rather than
+# allocated again for every state whose actions are listed
+_PASS_LEGAL_ACTION = AbstractState.LegalAction(gaction.PassAction())
+_DESTINATION_CARD_PICK_LEGAL_ACTION = AbstractState.LegalAction(
+    gaction.DestinationCardPickAction()
 )
 
 
+@add_slots
 @dataclass(frozen=True)
 class KnownState(AbstractState):
-    hands: frozendict[Player, KnownHandState]
+    # Hands are stored in the order of box.players, so that moving to the next state
+    # only copies a small tuple rather than rebuilding a frozendict.
+    hands: Tuple[KnownHandState, ...]
+    _player_hands_cached: Optional[frozendict[Player, KnownHandState]] = field(
+        init=False, compare=False, repr=False
+    )
+
+    __hash__ = AbstractState.__hash__
+
+    def __post_init__(self) -> None:
+        AbstractState.__post_init__(self)
+        object.__setattr__(self, "_player_hands_cached", None)
 
     @property
     def player_hands(self) -> frozendict[Player, KnownHandState]:
-        return self.hands
+        value = self._player_hands_cached
+        if value is None:
+            value = frozendict(zip(self.box.players, self.hands))
+            object.__setattr__(self, "_player_hands_cached", value)
+        return value
 
     def player_hand(self, player: Player) -> KnownHandState:
-        return self.hands[player]
+        return self.hands[self.box.player_indices[player]]
+
+    def _with_player_hand(
+        self, player: Player, hand: KnownHandState
+    ) -> Tuple[KnownHandState, ...]:
+        index = self.box.player_indices[player]
+        return self.hands[:index] + (hand,) + self.hands[index + 1 :]
 
     @classmethod
     def make(cls, box: Box, player: Player) -> KnownState:
         return KnownState(
             box=box,
-            hands=frozendict(
-                {
-                    p: KnownHandState(
-                        destination_cards=frozenset(),
-                        unselected_destination_cards=frozenset(),
-                        train_cards=TrainCards(),
-                        remaining_trains=box.starting_train_count,
-                        points_so_far=box.starting_score,
-                        complete_destination_cards=frozenset(),
-                        incomplete_destination_cards=frozenset(),
-                    )
-                    for p in box.players
-                }
+            hands=tuple(
+                KnownHandState(
+                    destination_cards=frozenset(),
+                    unselected_destination_cards=frozenset(),
+                    train_cards=TrainCards(),
+                    remaining_trains=box.starting_train_count,
+                    points_so_far=box.starting_score,
+                    complete_destination_cards=frozenset(),
+                    incomplete_destination_cards=frozenset(),
+                )
+                for _ in box.players
             ),
             discarded_train_cards=TrainCards(),
             face_up_train_cards=TrainCards(),
@@ -74,501 +122,505 @@ class KnownState(AbstractState):
                     for player in box.players
                 }
             ),
-            turn_state=gturn.InitialTurn(),
+            turn_state=gturn.InitialTurn.intern(),
         )
 
     def next_state(self, action: Action) -> KnownState:
-        unexpected_action_error = TrainsException(
-            f"unexpected action type {type(action)}"
+        return _cached_next_state(self, action)
+
+    @classmethod
+    def clear_caches(cls) -> None:
+        _cached_next_state.cache_clear()
+        _build_legal_actions.cache_clear()
+
+    def _compute_next_state(self, action: Action) -> KnownState:
+        turn_state = self.turn_state
+        transition = self._transitions.get((type(turn_state), type(action)))
+        if transition is None:
+            raise _unexpected_action_error(action)
+        return transition(self, turn_state, action)
+
+    def _last_turn_started(self, turn_state: gturn.PlayerStartTurn) -> bool:
+        return (
+            turn_state.last_turn_started
+            or self.player_hand(turn_state.player).remaining_trains
+            <= self.box.trains_to_end
         )
 
-        def perform_train_draw(
-            turn_state: Union[gturn.PlayerStartTurn, gturn.PlayerTrainCardDrawMidTurn],
-            action: gaction.TrainCardPickAction,
-            last_turn_started: bool,
-            second_draw: bool = False,
-        ) -> KnownState:
-            if action.draw_known:
-                next_turn_state = gturn.TrainCardDealTurn(
-                    1,
-                    None,
-                    gturn.PlayerStartTurn.make_or_end(
-                        last_turn_started,
-                        self.box.next_player_map[turn_state.player],
-                    )
-                    if second_draw or action.selected_card_if_known is None
-                    else gturn.PlayerTrainCardDrawMidTurn(
-                        last_turn_started,
-                        turn_state.player,
-                    ),
-                )
-                old_hand = self.hands[turn_state.player]
-                return replace(
-                    self,
-                    turn_state=next_turn_state,
-                    hands=frozendict(
-                        {
-                            **self.hands,
-                            turn_state.player: replace(
-                                old_hand,
-                                train_cards=old_hand.train_cards.incrementing(
-                                    action.selected_card_if_known, 1
-                                ),
-                            ),
-                        }
-                    ),
-                    face_up_train_cards=self.face_up_train_cards.incrementing(
-                        action.selected_card_if_known, -1
-                    ),
-                )
-            else:
-                return replace(
-                    self,
-                    turn_state=gturn.TrainCardDealTurn(
-                        1,
-                        self.turn_state.player,
-                        gturn.PlayerStartTurn.make_or_end(
-                            last_turn_started,
-                            self.box.next_player_map[turn_state.player],
-                        )
-                        if second_draw
-                        else gturn.PlayerTrainCardDrawMidTurn(
-                            last_turn_started, turn_state.player
-                        ),
-                    ),
-                )
+    def _perform_train_draw(
+        self,
+        turn_state: Union[gturn.PlayerStartTurn, gturn.PlayerTrainCardDrawMidTurn],
+        action: gaction.TrainCardPickAction,
+        last_turn_started: bool,
+        second_draw: bool = False,
+    ) -> KnownState:
+        player = turn_state.player
+        card = action.selected_card_if_known
+        # the turn the player moves on to once the drawn card has been dealt
+        if second_draw or (action.draw_known and card is None):
+            after_deal: TurnState = gturn.PlayerStartTurn.make_or_end(
+                last_turn_started, self.box.next_player_map[player]
+            )
+        else:
+            after_deal = gturn.PlayerTrainCardDrawMidTurn.intern(
+                last_turn_started, player
+            )
 
-        if isinstance(self.turn_state, gturn.PlayerInitialDestinationCardChoiceTurn):
-            if isinstance(action, gaction.DestinationCardSelectionAction):
-                next_player = self.box.next_player_map[self.turn_state.player]
-                if next_player == self.box.players[0]:
-                    next_turn: TurnState = gturn.PlayerStartTurn(
-                        last_turn_started=False, player=next_player
-                    )
-                else:
-                    next_turn = gturn.PlayerInitialDestinationCardChoiceTurn(
-                        next_player
-                    )
-                old_hand = self.hands[self.turn_state.player]
-                return replace(
-                    self,
-                    turn_state=next_turn,
-                    hands=frozendict(
-                        {
-                            **self.hands,
-                            self.turn_state.player: replace(
-                                old_hand,
-                                unselected_destination_cards=frozenset(),
-                                destination_cards=action.selected_cards,
-                                incomplete_destination_cards=action.selected_cards,
-                            ),
-                        }
-                    ),
-                    destination_card_pile_distribution=self.destination_card_pile_distribution
-                    | (old_hand.unselected_destination_cards - action.selected_cards),
-                    destination_card_pile_size=self.destination_card_pile_size
-                    + (
-                        len(old_hand.unselected_destination_cards)
-                        - len(action.selected_cards)
+        if action.draw_known:
+            old_hand = self.player_hand(player)
+            return fast_replace(
+                self,
+                turn_state=gturn.TrainCardDealTurn.intern(1, None, after_deal),
+                hands=self._with_player_hand(
+                    player,
+                    fast_replace(
+                        old_hand, train_cards=old_hand.train_cards.incrementing(card, 1)
                     ),
-                )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.PlayerStartTurn):
-            old_hand = self.hands[self.turn_state.player]
-            last_turn_started = (
-                self.turn_state.last_turn_started
-                or old_hand.remaining_trains <= self.box.trains_to_end
+                ),
+                face_up_train_cards=self.face_up_train_cards.incrementing(card, -1),
             )
-            if isinstance(action, gaction.PassAction):
-                return replace(
-                    self,
-                    turn_state=gturn.PlayerStartTurn.make_or_end(
-                        last_turn_started,
-                        self.box.next_player_map[self.turn_state.player],
-                    ),
-                )
-            elif isinstance(action, gaction.BuildAction):
-                new_cluster = self.built_clusters[self.turn_state.player].connect(
-                    *action.route.cities
-                )
-                completed_destination_cards = {
-                    card
-                    for card in old_hand.incomplete_destination_cards
-                    if new_cluster.is_connected(card.cities)
-                }
-                return replace(
-                    self,
-                    turn_state=gturn.PlayerStartTurn.make_or_end(
-                        last_turn_started,
-                        self.box.next_player_map[self.turn_state.player],
-                    ),
-                    built_routes=frozendict(
-                        {
-                            **self.built_routes,
-                            action.route: self.turn_state.player,
-                        }
-                    ),
-                    built_clusters=frozendict(
-                        {
-                            **self.built_clusters,
-                            self.turn_state.player: new_cluster,
-                        }
-                    ),
-                    hands=frozendict(
-                        {
-                            **self.hands,
-                            self.turn_state.player: replace(
-                                old_hand,
-                                train_cards=subtract_train_cards(
-                                    old_hand.train_cards, action.train_cards
-                                )[0],
-                                remaining_trains=old_hand.remaining_trains
-                                - action.route.length,
-                                points_so_far=old_hand.points_so_far
-                                + self.box.route_point_values[action.route.length]
-                                + sum(
-                                    card.value for card in completed_destination_cards
-                                ),
-                                complete_destination_cards=old_hand.complete_destination_cards
-                                | completed_destination_cards,
-                                incomplete_destination_cards=old_hand.incomplete_destination_cards
-                                - completed_destination_cards,
-                            ),
-                        }
-                    ),
-                    discarded_train_cards=merge_train_cards(
-                        self.discarded_train_cards, action.train_cards
-                    ),
-                )
-            elif isinstance(action, gaction.TrainCardPickAction):
-                return perform_train_draw(self.turn_state, action, last_turn_started)
-            elif isinstance(action, gaction.DestinationCardPickAction):
-                return replace(
-                    self,
-                    turn_state=gturn.DestinationCardDealTurn(
-                        last_turn_started, self.turn_state.player
-                    ),
-                )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.PlayerTrainCardDrawMidTurn):
-            if isinstance(action, gaction.TrainCardPickAction):
-                return perform_train_draw(
-                    self.turn_state,
-                    action,
-                    self.turn_state.last_turn_started,
-                    second_draw=True,
-                )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.PlayerDestinationCardDrawMidTurn):
-            if isinstance(action, gaction.DestinationCardSelectionAction):
-                next_turn_state: TurnState = gturn.PlayerStartTurn.make_or_end(
-                    self.turn_state.last_turn_started,
-                    self.box.next_player_map[self.turn_state.player],
-                )
-                old_hand = self.hands[self.turn_state.player]
-                return replace(
+        else:
+            return fast_replace(
+                self, turn_state=gturn.TrainCardDealTurn.intern(1, player, after_deal)
+            )
+
+    def _next_from_initial_destination_selection(
+        self,
+        turn_state: gturn.PlayerInitialDestinationCardChoiceTurn,
+        action: gaction.DestinationCardSelectionAction,
+    ) -> KnownState:
+        next_player = self.box.next_player_map[turn_state.player]
+        if next_player == self.box.players[0]:
+            next_turn: TurnState = gturn.PlayerStartTurn.intern(
+                last_turn_started=False, player=next_player
+            )
+        else:
+            next_turn = gturn.PlayerInitialDestinationCardChoiceTurn.intern(next_player)
+        old_hand = self.player_hand(turn_state.player)
+        return fast_replace(
+            self,
+            turn_state=next_turn,
+            hands=self._with_player_hand(
+                turn_state.player,
+                fast_replace(
+                    old_hand,
+                    unselected_destination_cards=frozenset(),
+                    destination_cards=action.selected_cards,
+                    incomplete_destination_cards=action.selected_cards,
+                ),
+            ),
+            destination_card_pile_distribution=self.destination_card_pile_distribution
+            | (old_hand.unselected_destination_cards - action.selected_cards),
+            destination_card_pile_size=self.destination_card_pile_size
+            + (len(old_hand.unselected_destination_cards) - len(action.selected_cards)),
+        )
+
+    def _next_from_pass(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.PassAction
+    ) -> KnownState:
+        return fast_replace(
+            self,
+            turn_state=gturn.PlayerStartTurn.make_or_end(
+                self._last_turn_started(turn_state),
+                self.box.next_player_map[turn_state.player],
+            ),
+        )
+
+    def _next_from_build(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.BuildAction
+    ) -> KnownState:
+        # builds are the most common transition late in the game, so the new hand and
+        # state are constructed directly from values worked out here rather than by
+        # layering replace() calls
+        player = turn_state.player
+        route = action.route
+        old_hand = self.player_hand(player)
+        new_cluster = self.built_clusters[player].connect(*route.cities)
+
+        points_so_far = (
+            old_hand.points_so_far + self.box.route_point_values[route.length]
+        )
+        complete_destination_cards = old_hand.complete_destination_cards
+        incomplete_destination_cards = old_hand.incomplete_destination_cards
+        completed_destination_cards = frozenset(
+            card
+            for card in incomplete_destination_cards
+            if new_cluster.is_connected(card.cities)
+        )
+        if completed_destination_cards:
+            points_so_far += destination_cards_value(completed_destination_cards)
+            complete_destination_cards = (
+                complete_destination_cards | completed_destination_cards
+            )
+            incomplete_destination_cards = (
+                incomplete_destination_cards - completed_destination_cards
+            )
+
+        return KnownState(
+            box=self.box,
+            hands=self._with_player_hand(
+                player,
+                KnownHandState(
+                    destination_cards=old_hand.destination_cards,
+                    unselected_destination_cards=old_hand.unselected_destination_cards,
+                    train_cards=old_hand.train_cards.subtracting(action.train_cards),
+                    remaining_trains=old_hand.remaining_trains - route.length,
+                    points_so_far=points_so_far,
+                    complete_destination_cards=complete_destination_cards,
+                    incomplete_destination_cards=incomplete_destination_cards,
+                ),
+            ),
+            discarded_train_cards=merge_train_cards(
+                self.discarded_train_cards, action.train_cards
+            ),
+            face_up_train_cards=self.face_up_train_cards,
+            train_card_pile_distribution=self.train_card_pile_distribution,
+            destination_card_pile_distribution=self.destination_card_pile_distribution,
+            destination_card_pile_size=self.destination_card_pile_size,
+            built_routes=frozendict_set(self.built_routes, route, player),
+            built_clusters=frozendict_set(self.built_clusters, player, new_cluster),
+            turn_state=gturn.PlayerStartTurn.make_or_end(
+                self._last_turn_started(turn_state),
+                self.box.next_player_map[player],
+            ),
+        )
+
+    def _next_from_first_train_card_pick(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.TrainCardPickAction
+    ) -> KnownState:
+        return self._perform_train_draw(
+            turn_state, action, self._last_turn_started(turn_state)
+        )
+
+    def _next_from_destination_card_pick(
+        self,
+        turn_state: gturn.PlayerStartTurn,
+        action: gaction.DestinationCardPickAction,
+    ) -> KnownState:
+        return fast_replace(
+            self,
+            turn_state=gturn.DestinationCardDealTurn.intern(
+                self._last_turn_started(turn_state), turn_state.player
+            ),
+        )
+
+    def _next_from_second_train_card_pick(
+        self,
+        turn_state: gturn.PlayerTrainCardDrawMidTurn,
+        action: gaction.TrainCardPickAction,
+    ) -> KnownState:
+        return self._perform_train_draw(
+            turn_state,
+            action,
+            turn_state.last_turn_started,
+            second_draw=True,
+        )
+
+    def _next_from_dealt_destination_selection(
+        self,
+        turn_state: gturn.PlayerDestinationCardDrawMidTurn,
+        action: gaction.DestinationCardSelectionAction,
+    ) -> KnownState:
+        player = turn_state.player
+        selected_cards = action.selected_cards
+        old_hand = self.player_hand(player)
+        unselected_cards = old_hand.unselected_destination_cards
+        return fast_replace(
+            self,
+            hands=self._with_player_hand(
+                player,
+                fast_replace(
+                    old_hand,
+                    unselected_destination_cards=frozenset(),
+                    destination_cards=old_hand.destination_cards | selected_cards,
+                    incomplete_destination_cards=old_hand.incomplete_destination_cards
+                    | selected_cards,
+                ),
+            ),
+            turn_state=gturn.PlayerStartTurn.make_or_end(
+                turn_state.last_turn_started, self.box.next_player_map[player]
+            ),
+            destination_card_pile_distribution=self.destination_card_pile_distribution
+            | (unselected_cards - selected_cards),
+            destination_card_pile_size=self.destination_card_pile_size
+            + len(unselected_cards)
+            - len(selected_cards),
+        )
+
+    def _next_from_destination_card_deal(
+        self,
+        turn_state: gturn.DestinationCardDealTurn,
+        action: gaction.DestinationCardDealAction,
+    ) -> KnownState:
+        next_turn_state = gturn.PlayerDestinationCardDrawMidTurn.intern(
+            turn_state.last_turn_started, turn_state.to_player
+        )
+        return fast_replace(
+            self,
+            turn_state=next_turn_state,
+            hands=self._with_player_hand(
+                turn_state.to_player,
+                fast_replace(
+                    self.player_hand(turn_state.to_player),
+                    unselected_destination_cards=action.cards,
+                ),
+            ),
+            destination_card_pile_distribution=self.destination_card_pile_distribution
+            - action.cards,
+            destination_card_pile_size=self.destination_card_pile_size
+            - len(action.cards),
+        )
+
+    def _next_from_train_card_deal(
+        self, turn_state: gturn.TrainCardDealTurn, action: gaction.TrainCardDealAction
+    ) -> KnownState:
+        if turn_state.to_player is None:
+            new_face_up_cards = merge_train_cards(
+                self.face_up_train_cards, action.cards
+            )
+            if new_face_up_cards[None] >= self.box.wildcards_to_clear:
+                return fast_replace(
                     self,
-                    hands=frozendict(
-                        {
-                            **self.hands,
-                            self.turn_state.player: replace(
-                                old_hand,
-                                unselected_destination_cards=frozenset(),
-                                destination_cards=old_hand.destination_cards
-                                | action.selected_cards,
-                                incomplete_destination_cards=old_hand.incomplete_destination_cards
-                                | action.selected_cards,
-                            ),
-                        }
+                    face_up_train_cards=TrainCards(),
+                    turn_state=gturn.TrainCardDealTurn.intern(
+                        count=self.box.face_up_train_cards,
+                        to_player=None,
+                        next_turn_state=turn_state.next_turn_state,
                     ),
-                    turn_state=next_turn_state,
-                    destination_card_pile_distribution=self.destination_card_pile_distribution
-                    | (old_hand.unselected_destination_cards - action.selected_cards),
-                    destination_card_pile_size=self.destination_card_pile_size
-                    + len(old_hand.unselected_destination_cards)
-                    - len(action.selected_cards),
                 )
             else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.DestinationCardDealTurn):
-            if isinstance(action, gaction.DestinationCardDealAction):
-                next_turn_state = gturn.PlayerDestinationCardDrawMidTurn(
-                    self.turn_state.last_turn_started, self.turn_state.to_player
-                )
-                return replace(
+                return fast_replace(
                     self,
-                    turn_state=next_turn_state,
-                    hands=frozendict(
-                        {
-                            **self.hands,
-                            self.turn_state.to_player: replace(
-                                self.hands[self.turn_state.to_player],
-                                unselected_destination_cards=action.cards,
-                            ),
-                        }
-                    ),
-                    destination_card_pile_distribution=self.destination_card_pile_distribution
-                    - action.cards,
-                    destination_card_pile_size=self.destination_card_pile_size
-                    - len(action.cards),
+                    turn_state=turn_state.next_turn_state,
+                    face_up_train_cards=new_face_up_cards,
                 )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.TrainCardDealTurn):
-            if isinstance(action, gaction.TrainCardDealAction):
-                if self.turn_state.to_player is None:
-                    new_face_up_cards = merge_train_cards(
-                        self.face_up_train_cards, action.cards
-                    )
-                    if new_face_up_cards[None] >= self.box.wildcards_to_clear:
-                        return replace(
-                            self,
-                            face_up_train_cards=TrainCards(),
-                            turn_state=gturn.TrainCardDealTurn(
-                                count=self.box.face_up_train_cards,
-                                to_player=None,
-                                next_turn_state=self.turn_state.next_turn_state,
-                            ),
-                        )
-                    else:
-                        return replace(
-                            self,
-                            turn_state=self.turn_state.next_turn_state,
-                            face_up_train_cards=new_face_up_cards,
-                        )
-                else:
-                    old_hand = self.hands[self.turn_state.to_player]
-                    return replace(
-                        self,
-                        turn_state=self.turn_state.next_turn_state,
-                        train_card_pile_distribution=subtract_train_cards(
-                            self.train_card_pile_distribution, action.cards
-                        )[0],
-                        hands=frozendict(
-                            {
-                                **self.hands,
-                                self.turn_state.to_player: replace(
-                                    old_hand,
-                                    train_cards=merge_train_cards(
-                                        old_hand.train_cards, action.cards
-                                    ),
-                                ),
-                            }
+        else:
+            old_hand = self.player_hand(turn_state.to_player)
+            return fast_replace(
+                self,
+                turn_state=turn_state.next_turn_state,
+                train_card_pile_distribution=self.train_card_pile_distribution.subtracting(
+                    action.cards
+                ),
+                hands=self._with_player_hand(
+                    turn_state.to_player,
+                    fast_replace(
+                        old_hand,
+                        train_cards=merge_train_cards(
+                            old_hand.train_cards, action.cards
                         ),
-                    )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.GameOverTurn):
-            if isinstance(action, gaction.PassAction):
-                return self
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.InitialTurn):
-            if isinstance(action, gaction.InitialDealAction):
-                return replace(
-                    self,
-                    hands=frozendict(
-                        (
-                            player,
-                            replace(
-                                old_hand,
-                                unselected_destination_cards=action.destination_cards[
-                                    player
-                                ],
-                                train_cards=action.train_cards[player],
-                            ),
-                        )
-                        for player, old_hand in self.hands.items()
-                    ),
-                    destination_card_pile_distribution=self.destination_card_pile_distribution
-                    - set().union(*action.destination_cards.values()),  # type: ignore
-                    destination_card_pile_size=self.destination_card_pile_size
-                    - sum(map(len, action.destination_cards.values())),
-                    train_card_pile_distribution=subtract_train_cards(
-                        self.train_card_pile_distribution,
-                        merge_train_cards(*action.train_cards.values()),
-                    )[0],
-                    turn_state=gturn.PlayerInitialDestinationCardChoiceTurn(
-                        self.box.players[0]
-                    ),
-                    face_up_train_cards=merge_train_cards(
-                        self.face_up_train_cards, action.face_up_train_cards
                     ),
-                )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.RevealFinalDestinationCardsTurn):
-            if isinstance(action, gaction.RevealFinalDestinationCardsAction):
-                return replace(self, turn_state=gturn.GameOverTurn())
-            else:
-                raise unexpected_action_error
-        else:
-            assert_never(self.turn_state)
-
-    def get_legal_actions(self) -> Generator[AbstractState.LegalAction, None, None]:
-        def get_train_card_draw_actions(
-            second: bool = False,
-        ) -> Generator[KnownState.LegalAction, None, None]:
-            for color, count in self.face_up_train_cards.items():
-                if count > 0 and not (second and color is None):
-                    yield KnownState.LegalAction(
-                        gaction.TrainCardPickAction(True, color)
-                    )
-            yield KnownState.LegalAction(gaction.TrainCardPickAction(False, None))
-
-        def get_build_actions(
-            player: Player,
-        ) -> Generator[KnownState.LegalAction, None, None]:
-            hand = self.hands[player]
-            for route in self.box.board.routes:
-                if (
-                    route not in self.built_routes
-                    and route.length <= hand.remaining_trains
-                    and (
-                        (
-                            len(self.box.players)
-                            >= self.box.double_routes_player_minimum
-                            and not any(
-                                self.built_routes.get(double, None) == player
-                                for double in self.box.board.double_routes[route]
-                            )
-                        )
-                        or not any(
-                            double in self.built_routes
-                            for double in self.box.board.double_routes[route]
-                        )
-                    )
-                ):
-                    if route.color is None:
-                        colors: Iterable[Color] = self.box.colors
-                    else:
-                        colors = [route.color]
-
-                    for color in colors:
-                        max_color_cards = min(hand.train_cards[color], route.length)
-                        max_wildcards = min(hand.train_cards[None], route.length - 1)
-                        for color_cards in range(
-                            route.length - max_wildcards, max_color_cards + 1
-                        ):
-                            cards_to_build = TrainCards(
-                                {color: color_cards, None: route.length - color_cards}
-                            )
-                            yield KnownState.LegalAction(
-                                gaction.BuildAction(route, cards_to_build),
-                                probability=probability_of_having_cards(
-                                    cards_to_build,
-                                    0,
-                                    self.train_card_pile_distribution,
-                                ),
-                            )
-                    if hand.train_cards[None] >= route.length:
-                        cards_to_build = TrainCards({None: route.length})
-                        yield KnownState.LegalAction(
-                            gaction.BuildAction(route, cards_to_build),
-                            probability=probability_of_having_cards(
-                                cards_to_build,
-                                0,
-                                self.train_card_pile_distribution,
-                            ),
-                        )
-
-        def get_train_card_deal_actions(
-            count: int, distribution: TrainCards
-        ) -> Generator[KnownState.LegalAction, None, None]:
-            for train_cards, prob in self._deal_train_cards(count, distribution):
-                yield KnownState.LegalAction(
-                    gaction.TrainCardDealAction(train_cards),
-                    probability=prob,
-                )
-
-        def get_final_destination_cards(
-            revealed_so_far: Optional[Cons[Tuple[Player, FrozenSet[DestinationCard]]]],
-            remaining_counts: Optional[Cons[Tuple[Player, int]]],
-            pile: FrozenSet[DestinationCard],
-        ) -> Generator[Dict[Player, FrozenSet[DestinationCard]], None, None]:
-            if remaining_counts is None:
-                yield dict(Cons.iterate(revealed_so_far))
-            else:
-                player, count = remaining_counts.head
-                for cards in itertools.combinations(pile, count):
-                    cards_set = frozenset(cards)
-                    yield from get_final_destination_cards(
-                        Cons((player, cards_set), revealed_so_far),
-                        remaining_counts.rest,
-                        pile=cards_set,
-                    )
-
-        if isinstance(self.turn_state, gturn.InitialTurn):
-            return  # TODO: probably unnecessary to implement
-        elif isinstance(
-            self.turn_state, gturn.PlayerInitialDestinationCardChoiceTurn
-        ) or isinstance(self.turn_state, gturn.PlayerDestinationCardDrawMidTurn):
-            legal_cards_range = (
-                self.box.starting_destination_cards_range
-                if isinstance(
-                    self.turn_state, gturn.PlayerInitialDestinationCardChoiceTurn
-                )
-                else self.box.dealt_destination_cards_range
+                ),
             )
-            hand = self.hands[self.turn_state.player]
-            allowed_card_numbers = list(
-                range(
-                    legal_cards_range[0],
-                    len(hand.unselected_destination_cards) + 1,
+
+    def _next_from_game_over(
+        self, turn_state: gturn.GameOverTurn, action: gaction.PassAction
+    ) -> KnownState:
+        return self
+
+    def _next_from_initial_deal(
+        self, turn_state: gturn.InitialTurn, action: gaction.InitialDealAction
+    ) -> KnownState:
+        return fast_replace(
+            self,
+            hands=tuple(
+                fast_replace(
+                    old_hand,
+                    unselected_destination_cards=action.destination_cards[player],
+                    train_cards=action.train_cards[player],
                 )
-            )
-            for kept_cards in allowed_card_numbers:
-                for card_selections in itertools.combinations(
-                    hand.unselected_destination_cards, kept_cards
-                ):
-                    yield KnownState.LegalAction(
-                        gaction.DestinationCardSelectionAction(
-                            frozenset(card_selections)
-                        )
-                    )
-        elif isinstance(self.turn_state, gturn.PlayerStartTurn):
-            if self.destination_card_pile_size > 0:
-                yield KnownState.LegalAction(gaction.DestinationCardPickAction())
-            yield from get_train_card_draw_actions()
-            yield from get_build_actions(self.turn_state.player)
-        elif isinstance(self.turn_state, gturn.PlayerTrainCardDrawMidTurn):
-            yield from get_train_card_draw_actions(second=True)
-        elif isinstance(self.turn_state, gturn.DestinationCardDealTurn):
-            cards = min(
-                self.box.dealt_destination_cards_range[1],
-                self.destination_card_pile_size,
-            )
-            prob = 1 / math.comb(len(self.destination_card_pile_distribution), cards)
+                for player, old_hand in zip(self.box.players, self.hands)
+            ),
+            destination_card_pile_distribution=self.destination_card_pile_distribution
+            - set().union(*action.destination_cards.values()),  # type: ignore
+            destination_card_pile_size=self.destination_card_pile_size
+            - sum(map(len, action.destination_cards.values())),
+            train_card_pile_distribution=self.train_card_pile_distribution.subtracting(
+                merge_train_cards(*action.train_cards.values())
+            ),
+            turn_state=gturn.PlayerInitialDestinationCardChoiceTurn.intern(
+                self.box.players[0]
+            ),
+            face_up_train_cards=merge_train_cards(
+                self.face_up_train_cards, action.face_up_train_cards
+            ),
+        )
+
+    def _next_from_reveal_final_destination_cards(
+        self,
+        turn_state: gturn.RevealFinalDestinationCardsTurn,
+        action: gaction.RevealFinalDestinationCardsAction,
+    ) -> KnownState:
+        return fast_replace(self, turn_state=gturn.GameOverTurn.intern())
+
+    def _generate_legal_actions(
+        self,
+    ) -> Generator[AbstractState.LegalAction, None, None]:
+        turn_state = self.turn_state
+        yield from self._legal_action_generators[type(turn_state)](self, turn_state)
 
-            for dealt_cards in itertools.combinations(
-                self.destination_card_pile_distribution, cards
+    def _get_build_actions(self, player: Player) -> Tuple[KnownState.LegalAction, ...]:
+        hand = self.player_hand(player)
+        return _build_legal_actions(
+            self.box,
+            self.built_routes,
+            player,
+            hand.train_cards,
+            hand.remaining_trains,
+        )
+
+    def _initial_legal_actions(
+        self, turn_state: gturn.InitialTurn
+    ) -> Generator[KnownState.LegalAction, None, None]:
+        # TODO: probably unnecessary to implement
+        yield from ()
+
+    def _destination_selection_legal_actions(
+        self,
+        turn_state: Union[
+            gturn.PlayerInitialDestinationCardChoiceTurn,
+            gturn.PlayerDestinationCardDrawMidTurn,
+        ],
+    ) -> Generator[KnownState.LegalAction, None, None]:
+        legal_cards_range = (
+            self.box.starting_destination_cards_range
+            if isinstance(turn_state, gturn.PlayerInitialDestinationCardChoiceTurn)
+            else self.box.dealt_destination_cards_range
+        )
+        hand = self.player_hand(turn_state.player)
+        allowed_card_numbers = list(
+            range(
+                legal_cards_range[0],
+                len(hand.unselected_destination_cards) + 1,
+            )
+        )
+        for kept_cards in allowed_card_numbers:
+            for card_selections in itertools.combinations(
+                hand.unselected_destination_cards, kept_cards
             ):
                 yield KnownState.LegalAction(
-                    gaction.DestinationCardDealAction(frozenset(dealt_cards)),
-                    probability=prob,
+                    gaction.DestinationCardSelectionAction(frozenset(card_selections))
                 )
-        elif isinstance(self.turn_state, gturn.TrainCardDealTurn):
-            yield from get_train_card_deal_actions(
-                self.turn_state.count, self.train_card_pile_distribution
+
+    def _start_turn_legal_actions(
+        self, turn_state: gturn.PlayerStartTurn
+    ) -> Generator[KnownState.LegalAction, None, None]:
+        if self.destination_card_pile_size > 0:
+            yield _DESTINATION_CARD_PICK_LEGAL_ACTION
+        yield from train_card_draw_legal_actions(self.face_up_train_cards)
+        yield from self._get_build_actions(turn_state.player)
+
+    def _train_card_draw_mid_turn_legal_actions(
+        self, turn_state: gturn.PlayerTrainCardDrawMidTurn
+    ) -> Generator[KnownState.LegalAction, None, None]:
+        yield from train_card_draw_legal_actions(self.face_up_train_cards, second=True)
+
+    def _destination_card_deal_legal_actions(
+        self, turn_state: gturn.DestinationCardDealTurn
+    ) -> Generator[KnownState.LegalAction, None, None]:
+        cards = min(
+            self.box.dealt_destination_cards_range[1],
+            self.destination_card_pile_size,
+        )
+        prob = 1 / math.comb(len(self.destination_card_pile_distribution), cards)
+
+        for dealt_cards in itertools.combinations(
+            self.destination_card_pile_distribution, cards
+        ):
+            yield KnownState.LegalAction(
+                gaction.DestinationCardDealAction(frozenset(dealt_cards)),
+                probability=prob,
             )
-        elif isinstance(self.turn_state, gturn.GameOverTurn):
-            yield KnownState.LegalAction(gaction.PassAction())
-        elif isinstance(self.turn_state, gturn.RevealFinalDestinationCardsTurn):
+
+    def _train_card_deal_legal_actions(
+        self, turn_state: gturn.TrainCardDealTurn
+    ) -> Generator[KnownState.LegalAction, None, None]:
+        for train_cards, prob in self._deal_train_cards(
+            turn_state.count, self.train_card_pile_distribution
+        ):
             yield KnownState.LegalAction(
-                gaction.RevealFinalDestinationCardsAction(
-                    frozendict(
-                        {
-                            player: hand.destination_cards
-                            for player, hand in self.hands.items()
-                        }
-                    )
+                gaction.TrainCardDealAction(train_cards),
+                probability=prob,
+            )
+
+    def _game_over_legal_actions(
+        self, turn_state: gturn.GameOverTurn
+    ) -> Generator[KnownState.LegalAction, None, None]:
+        yield _PASS_LEGAL_ACTION
+
+    def _reveal_final_destination_cards_legal_actions(
+        self, turn_state: gturn.RevealFinalDestinationCardsTurn
+    ) -> Generator[KnownState.LegalAction, None, None]:
+        yield KnownState.LegalAction(
+            gaction.RevealFinalDestinationCardsAction(
+                frozendict(
+                    {
+                        player: hand.destination_cards
+                        for player, hand in self.player_hands.items()
+                    }
                 )
             )
-        else:
-            assert_never(self.turn_state)
+        )
+
+    # next_state dispatches on the exact types of the turn state and the action, and
+    # the legal actions on the exact type of the turn state. A pair that is missing
+    # from the transitions is an unexpected action.
+    _transitions: ClassVar[
+        Dict[Tuple[type, type], Callable[[KnownState, Any, Any], KnownState]]
+    ] = {
+        (
+            gturn.PlayerInitialDestinationCardChoiceTurn,
+            gaction.DestinationCardSelectionAction,
+        ): _next_from_initial_destination_selection,
+        (gturn.PlayerStartTurn, gaction.PassAction): _next_from_pass,
+        (gturn.PlayerStartTurn, gaction.BuildAction): _next_from_build,
+        (
+            gturn.PlayerStartTurn,
+            gaction.TrainCardPickAction,
+        ): _next_from_first_train_card_pick,
+        (
+            gturn.PlayerStartTurn,
+            gaction.DestinationCardPickAction,
+        ): _next_from_destination_card_pick,
+        (
+            gturn.PlayerTrainCardDrawMidTurn,
+            gaction.TrainCardPickAction,
+        ): _next_from_second_train_card_pick,
+        (
+            gturn.PlayerDestinationCardDrawMidTurn,
+            gaction.DestinationCardSelectionAction,
+        ): _next_from_dealt_destination_selection,
+        (
+            gturn.DestinationCardDealTurn,
+            gaction.DestinationCardDealAction,
+        ): _next_from_destination_card_deal,
+        (
+            gturn.TrainCardDealTurn,
+            gaction.TrainCardDealAction,
+        ): _next_from_train_card_deal,
+        (gturn.GameOverTurn, gaction.PassAction): _next_from_game_over,
+        (gturn.InitialTurn, gaction.InitialDealAction): _next_from_initial_deal,
+        (
+            gturn.RevealFinalDestinationCardsTurn,
+            gaction.RevealFinalDestinationCardsAction,
+        ): _next_from_reveal_final_destination_cards,
+    }
+    _legal_action_generators: ClassVar[
+        Dict[
+            type,
+            Callable[[KnownState, Any], Generator[KnownState.LegalAction, None, None]],
+        ]
+    ] = {
+        gturn.InitialTurn: _initial_legal_actions,
+        gturn.PlayerInitialDestinationCardChoiceTurn: _destination_selection_legal_actions,
+        gturn.PlayerDestinationCardDrawMidTurn: _destination_selection_legal_actions,
+        gturn.PlayerStartTurn: _start_turn_legal_actions,
+        gturn.PlayerTrainCardDrawMidTurn: _train_card_draw_mid_turn_legal_actions,
+        gturn.DestinationCardDealTurn: _destination_card_deal_legal_actions,
+        gturn.TrainCardDealTurn: _train_card_deal_legal_actions,
+        gturn.GameOverTurn: _game_over_legal_actions,
+        gturn.RevealFinalDestinationCardsTurn: _reveal_final_destination_cards_legal_actions,
+    }
 
     def assumed_hands(
         self: State,
@@ -581,3 +633,72 @@ class KnownState(AbstractState):
 
     def hand_is_known(self, player: Player) -> bool:
         return True
+
+
+# A player's build actions only depend on the routes built and on the player's own
+# hand, which both stay the same over the many turns in which the opponents draw cards,
+# so they are cached across states rather than rederived from every route each turn.
+# The probabilities are of having the cards among no unknown cards, so the pile
+# distribution doesn't enter into them.
+@functools.lru_cache(maxsize=2 ** 14)
+def _build_legal_actions(
+    box: Box,
+    built_routes: frozendict[Route, Player],
+    player: Player,
+    train_cards: TrainCards,
+    remaining_trains: int,
+) -> Tuple[KnownState.LegalAction, ...]:
+    return tuple(
+        _generate_build_legal_actions(
+            box, built_routes, player, train_cards, remaining_trains
+        )
+    )
+
+
+def _generate_build_legal_actions(
+    box: Box,
+    built_routes: frozendict[Route, Player],
+    player: Player,
+    train_cards: TrainCards,
+    remaining_trains: int,
+) -> Generator[KnownState.LegalAction, None, None]:
+    wildcards = train_cards[None]
+    for route in AbstractState._buildable_routes(
+        box, built_routes, player, remaining_trains
+    ):
+        length = route.length
+        if route.color is None:
+            colors: Iterable[Color] = box.colors
+        else:
+            colors = [route.color]
+
+        max_wildcards = min(wildcards, length - 1)
+        for color in colors:
+            max_color_cards = min(train_cards[color], length)
+            for color_cards in range(length - max_wildcards, max_color_cards + 1):
+                cards_to_build = TrainCards.of_card(
+                    color, color_cards, wildcards=length - color_cards
+                )
+                yield KnownState.LegalAction(
+                    gaction.BuildAction(route, cards_to_build),
+                    probability=probability_of_having_cards(
+                        cards_to_build, 0, TrainCards()
+                    ),
+                )
+        if wildcards >= length:
+            cards_to_build = TrainCards.of_card(None, length)
+            yield KnownState.LegalAction(
+                gaction.BuildAction(route, cards_to_build),
+                probability=probability_of_having_cards(
+                    cards_to_build, 0, TrainCards()
+                ),
+            )
+
+
+# The searches derive the same successors over and over: monte carlo sampling draws
+# actions with replacement, and consecutive searches share most of their trees. States
+# and actions are immutable and hashable, so successors are cached like a
+# transposition table. KnownState.clear_caches empties it, along with the build actions.
+@functools.lru_cache(maxsize=2 ** 14)
+def _cached_next_state(state: KnownState, action: Action) -> KnownState:
+    return state._compute_next_state(action)
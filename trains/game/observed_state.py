@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import functools
 import itertools
-from dataclasses import dataclass, replace
+from dataclasses import dataclass
 from typing import (
     FrozenSet,
     Dict,
     Union,
     Generator,
     Iterable,
+    Iterator,
+    List,
     Tuple,
     Optional,
     Callable,
+    Any,
+    ClassVar,
 )
 
 import math
@@ -25,6 +30,7 @@ from trains.game.box import (
     TrainCards,
     Box,
     Color,
+    Route,
     frozendict,
 )
 from trains.game.clusters import Clusters
@@ -33,17 +39,96 @@ from trains.game.state import (
     KnownHandState,
     AbstractState,
     HandState,
+    train_card_draw_legal_actions,
 )
 from trains.game.turn import TurnState
-from trains.mypy_util import assert_never
+from trains.mypy_util import add_slots, assert_never
 from trains.util import (
+    fast_replace,
+    frozendict_set,
     subtract_train_cards,
     merge_train_cards,
     probability_of_having_cards,
-    Cons,
+    destination_cards_value,
 )
 
 
+def _unexpected_action_error(action: Action) -> TrainsException:
+    return TrainsException(f"unexpected action type {type(action)}")
+
+
+def _complete_destination_cards(
+    cluster: Clusters,
+    points: int,
+    complete: FrozenSet[DestinationCard],
+    incomplete: FrozenSet[DestinationCard],
+) -> Tuple[int, FrozenSet[DestinationCard], FrozenSet[DestinationCard]]:
+    """
+    Move the incomplete destination cards that cluster connects to the complete ones,
+    adding their value to the points. Most builds complete no cards, in which case
+    the same sets are returned, so the new hand shares them (and their cached hashes)
+    instead of holding copies.
+    """
+    completed = frozenset(
+        card for card in incomplete if cluster.is_connected(card.cities)
+    )
+    if not completed:
+        return points, complete, incomplete
+    return (
+        points + destination_cards_value(completed),
+        complete | completed,
+        incomplete - completed,
+    )
+
+
+def _mask_bits(mask: int) -> List[int]:
+    bits = []
+    while mask:
+        lowest_bit = mask & -mask
+        bits.append(lowest_bit)
+        mask ^= lowest_bit
+    return bits
+
+
+def _enumerate_final_assignments(
+    counts: List[int], pile_mask: int
+) -> Iterator[List[int]]:
+    """
+    Enumerate every way of dealing counts[i] cards to player i from the destination
+    cards in pile_mask without dealing any card twice. Each assignment is given as a
+    list holding the mask of the cards dealt to each player.
+    """
+    if not counts:
+        yield []
+        return
+
+    # an explicit stack of the combinations being iterated for each player, rather
+    # than recursing once per player
+    chosen: List[int] = []
+    remaining_masks = [pile_mask]
+    stack = [itertools.combinations(_mask_bits(pile_mask), counts[0])]
+    while stack:
+        selection = next(stack[-1], None)
+        if selection is None:
+            stack.pop()
+            if chosen:
+                chosen.pop()
+                remaining_masks.pop()
+            continue
+
+        mask = sum(selection)
+        if len(stack) == len(counts):
+            yield chosen + [mask]
+        else:
+            remaining_mask = remaining_masks[-1] & ~mask
+            chosen.append(mask)
+            remaining_masks.append(remaining_mask)
+            stack.append(
+                itertools.combinations(_mask_bits(remaining_mask), counts[len(stack)])
+            )
+
+
+@add_slots
 @dataclass(frozen=True)
 class ObservedState(AbstractState):
     """
@@ -70,6 +155,8 @@ class ObservedState(AbstractState):
     opponent_hands: frozendict[Player, ObservedHandState]
     revealed_destination_cards: Optional[frozendict[Player, FrozenSet[DestinationCard]]]
 
+    __hash__ = AbstractState.__hash__
+
     @property
     def player_hands(self) -> Dict[Player, HandState]:
         return {**self.opponent_hands, self.player: self.hand}
@@ -122,542 +209,547 @@ class ObservedState(AbstractState):
                     for player in box.players
                 }
             ),
-            turn_state=gturn.InitialTurn(),
+            turn_state=gturn.InitialTurn.intern(),
             revealed_destination_cards=None,
         )
 
     def next_state(self, action: Action) -> ObservedState:
-        unexpected_action_error = TrainsException(
-            f"unexpected action type {type(action)}"
+        return _cached_next_state(self, action)
+
+    @classmethod
+    def clear_caches(cls) -> None:
+        _cached_next_state.cache_clear()
+
+    def _compute_next_state(self, action: Action) -> ObservedState:
+        turn_state = self.turn_state
+        transition = self._transitions.get((type(turn_state), type(action)))
+        if transition is None:
+            raise _unexpected_action_error(action)
+        return transition(self, turn_state, action)
+
+    def _last_turn_started(self, turn_state: gturn.PlayerStartTurn) -> bool:
+        remaining_trains = (
+            self.hand.remaining_trains
+            if turn_state.player == self.player
+            else self.opponent_hands[turn_state.player].remaining_trains
+        )
+        return (
+            turn_state.last_turn_started or remaining_trains <= self.box.trains_to_end
         )
 
-        def perform_train_draw(
-            turn_state: Union[gturn.PlayerStartTurn, gturn.PlayerTrainCardDrawMidTurn],
-            action: gaction.TrainCardPickAction,
-            last_turn_started: bool,
-            second_draw: bool = False,
-        ) -> ObservedState:
-            if action.draw_known:
-                next_turn_state = gturn.TrainCardDealTurn(
-                    1,
-                    None,
-                    gturn.PlayerStartTurn.make_or_end(
-                        last_turn_started,
-                        self.box.next_player_map[turn_state.player],
-                    )
-                    if second_draw or action.selected_card_if_known is None
-                    else gturn.PlayerTrainCardDrawMidTurn(
-                        last_turn_started,
-                        turn_state.player,
+    def _perform_train_draw(
+        self,
+        turn_state: Union[gturn.PlayerStartTurn, gturn.PlayerTrainCardDrawMidTurn],
+        action: gaction.TrainCardPickAction,
+        last_turn_started: bool,
+        second_draw: bool = False,
+    ) -> ObservedState:
+        player = turn_state.player
+        # the turn the player moves on to once the drawn card has been dealt
+        if second_draw or (action.draw_known and action.selected_card_if_known is None):
+            after_deal: TurnState = gturn.PlayerStartTurn.make_or_end(
+                last_turn_started, self.box.next_player_map[player]
+            )
+        else:
+            after_deal = gturn.PlayerTrainCardDrawMidTurn.intern(
+                last_turn_started, player
+            )
+
+        if action.draw_known:
+            next_turn_state = gturn.TrainCardDealTurn.intern(1, None, after_deal)
+            if player == self.player:
+                return fast_replace(
+                    self,
+                    turn_state=next_turn_state,
+                    hand=fast_replace(
+                        self.hand,
+                        train_cards=self.hand.train_cards.incrementing(
+                            action.selected_card_if_known, 1
+                        ),
+                    ),
+                    face_up_train_cards=self.face_up_train_cards.incrementing(
+                        action.selected_card_if_known, -1
                     ),
                 )
-                if turn_state.player == self.player:
-                    return replace(
-                        self,
-                        turn_state=next_turn_state,
-                        hand=replace(
-                            self.hand,
-                            train_cards=self.hand.train_cards.incrementing(
-                                action.selected_card_if_known, 1
-                            ),
-                        ),
-                        face_up_train_cards=self.face_up_train_cards.incrementing(
-                            action.selected_card_if_known, -1
-                        ),
-                    )
-                else:
-                    return replace(
-                        self,
-                        turn_state=next_turn_state,
-                        opponent_hands=frozendict(
-                            {
-                                **self.opponent_hands,
-                                turn_state.player: replace(
-                                    self.opponent_hands[turn_state.player],
-                                    known_train_cards=self.opponent_hands[
-                                        turn_state.player
-                                    ].known_train_cards.incrementing(
-                                        action.selected_card_if_known, 1
-                                    ),
-                                    train_cards_count=self.opponent_hands[
-                                        turn_state.player
-                                    ].train_cards_count
-                                    + 1,
-                                ),
-                            }
-                        ),
-                        face_up_train_cards=self.face_up_train_cards.incrementing(
-                            action.selected_card_if_known, -1
-                        ),
-                    )
             else:
-                return replace(
+                return fast_replace(
                     self,
-                    turn_state=gturn.TrainCardDealTurn(
-                        1,
-                        self.turn_state.player,
-                        gturn.PlayerStartTurn.make_or_end(
-                            last_turn_started,
-                            self.box.next_player_map[turn_state.player],
-                        )
-                        if second_draw
-                        else gturn.PlayerTrainCardDrawMidTurn(
-                            last_turn_started, turn_state.player
+                    turn_state=next_turn_state,
+                    opponent_hands=frozendict_set(
+                        self.opponent_hands,
+                        player,
+                        fast_replace(
+                            self.opponent_hands[player],
+                            known_train_cards=self.opponent_hands[
+                                player
+                            ].known_train_cards.incrementing(
+                                action.selected_card_if_known, 1
+                            ),
+                            train_cards_count=self.opponent_hands[
+                                player
+                            ].train_cards_count
+                            + 1,
                         ),
                     ),
+                    face_up_train_cards=self.face_up_train_cards.incrementing(
+                        action.selected_card_if_known, -1
+                    ),
                 )
+        else:
+            return fast_replace(
+                self, turn_state=gturn.TrainCardDealTurn.intern(1, player, after_deal)
+            )
 
-        if isinstance(self.turn_state, gturn.PlayerInitialDestinationCardChoiceTurn):
-            if isinstance(action, gaction.DestinationCardSelectionAction):
-                next_player = self.box.next_player_map[self.turn_state.player]
-                if next_player == self.box.players[0]:
-                    next_turn: TurnState = gturn.PlayerStartTurn(
-                        last_turn_started=False, player=next_player
-                    )
-                else:
-                    next_turn = gturn.PlayerInitialDestinationCardChoiceTurn(
-                        next_player
-                    )
-                if self.turn_state.player == self.player:
-                    return replace(
-                        self,
-                        turn_state=next_turn,
-                        hand=replace(
-                            self.hand,
-                            unselected_destination_cards=frozenset(),
-                            destination_cards=action.selected_cards,
-                            incomplete_destination_cards=action.selected_cards,
-                        ),
-                        destination_card_pile_distribution=self.destination_card_pile_distribution
-                        | (
-                            self.hand.unselected_destination_cards
-                            - action.selected_cards
-                        ),
-                        destination_card_pile_size=self.destination_card_pile_size
-                        + len(self.hand.unselected_destination_cards)
-                        - len(action.selected_cards),
-                    )
-                else:
-                    return replace(
-                        self,
-                        turn_state=next_turn,
-                        opponent_hands=frozendict(
-                            {
-                                **self.opponent_hands,
-                                self.turn_state.player: replace(
-                                    self.opponent_hands[self.turn_state.player],
-                                    unselected_destination_cards_count=0,
-                                    destination_cards_count=len(action.selected_cards),
-                                ),
-                            }
-                        ),
-                    )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.PlayerStartTurn):
-            remaining_trains = (
-                self.hand.remaining_trains
-                if self.turn_state.player == self.player
-                else self.opponent_hands[self.turn_state.player].remaining_trains
+    def _next_from_initial_destination_selection(
+        self,
+        turn_state: gturn.PlayerInitialDestinationCardChoiceTurn,
+        action: gaction.DestinationCardSelectionAction,
+    ) -> ObservedState:
+        next_player = self.box.next_player_map[turn_state.player]
+        if next_player == self.box.players[0]:
+            next_turn: TurnState = gturn.PlayerStartTurn.intern(
+                last_turn_started=False, player=next_player
             )
-            last_turn_started = (
-                self.turn_state.last_turn_started
-                or remaining_trains <= self.box.trains_to_end
+        else:
+            next_turn = gturn.PlayerInitialDestinationCardChoiceTurn.intern(next_player)
+        if turn_state.player == self.player:
+            return fast_replace(
+                self,
+                turn_state=next_turn,
+                hand=fast_replace(
+                    self.hand,
+                    unselected_destination_cards=frozenset(),
+                    destination_cards=action.selected_cards,
+                    incomplete_destination_cards=action.selected_cards,
+                ),
+                destination_card_pile_distribution=self.destination_card_pile_distribution
+                | (self.hand.unselected_destination_cards - action.selected_cards),
+                destination_card_pile_size=self.destination_card_pile_size
+                + len(self.hand.unselected_destination_cards)
+                - len(action.selected_cards),
             )
-            if isinstance(action, gaction.PassAction):
-                return replace(
-                    self,
-                    turn_state=gturn.PlayerStartTurn.make_or_end(
-                        last_turn_started,
-                        self.box.next_player_map[self.turn_state.player],
-                    ),
-                )
-            elif isinstance(action, gaction.BuildAction):
-                new_cluster = self.built_clusters[self.turn_state.player].connect(
-                    *action.route.cities
-                )
-                if self.turn_state.player == self.player:
-                    completed_destination_cards = {
-                        card
-                        for card in self.hand.incomplete_destination_cards
-                        if new_cluster.is_connected(card.cities)
-                    }
-                    return replace(
-                        self,
-                        turn_state=gturn.PlayerStartTurn.make_or_end(
-                            last_turn_started,
-                            self.box.next_player_map[self.turn_state.player],
-                        ),
-                        built_routes=frozendict(
-                            {
-                                **self.built_routes,
-                                action.route: self.turn_state.player,
-                            }
-                        ),
-                        built_clusters=frozendict(
-                            {
-                                **self.built_clusters,
-                                self.turn_state.player: new_cluster,
-                            }
-                        ),
-                        hand=replace(
-                            self.hand,
-                            train_cards=subtract_train_cards(
-                                self.hand.train_cards, action.train_cards
-                            )[0],
-                            remaining_trains=self.hand.remaining_trains
-                            - action.route.length,
-                            points_so_far=self.hand.points_so_far
-                            + self.box.route_point_values[action.route.length]
-                            + sum(card.value for card in completed_destination_cards),
-                            complete_destination_cards=self.hand.complete_destination_cards
-                            | completed_destination_cards,
-                            incomplete_destination_cards=self.hand.incomplete_destination_cards
-                            - completed_destination_cards,
-                        ),
-                        discarded_train_cards=merge_train_cards(
-                            self.discarded_train_cards, action.train_cards
-                        ),
-                    )
-                else:
-                    old_hand = self.opponent_hands[self.turn_state.player]
-                    new_known_train_cards, leftovers = subtract_train_cards(
-                        old_hand.known_train_cards, action.train_cards
-                    )
-                    completed_destination_cards = {
-                        card
-                        for card in old_hand.known_incomplete_destination_cards
-                        if new_cluster.is_connected(card.cities)
-                    }
-                    return replace(
-                        self,
-                        turn_state=gturn.PlayerStartTurn.make_or_end(
-                            last_turn_started,
-                            self.box.next_player_map[self.turn_state.player],
-                        ),
-                        built_routes=frozendict(
-                            {
-                                **self.built_routes,
-                                action.route: self.turn_state.player,
-                            }
-                        ),
-                        built_clusters=frozendict(
-                            {
-                                **self.built_clusters,
-                                self.turn_state.player: new_cluster,
-                            }
-                        ),
-                        opponent_hands=frozendict(
-                            {
-                                **self.opponent_hands,
-                                self.turn_state.player: replace(
-                                    old_hand,
-                                    known_train_cards=new_known_train_cards,
-                                    train_cards_count=old_hand.train_cards_count
-                                    - action.route.length,
-                                    remaining_trains=old_hand.remaining_trains
-                                    - action.route.length,
-                                    known_points_so_far=old_hand.known_points_so_far
-                                    + self.box.route_point_values[action.route.length]
-                                    + sum(
-                                        card.value
-                                        for card in completed_destination_cards
-                                    ),
-                                    known_complete_destination_cards=old_hand.known_complete_destination_cards
-                                    | completed_destination_cards,
-                                    known_incomplete_destination_cards=old_hand.known_incomplete_destination_cards
-                                    - completed_destination_cards,
-                                ),
-                            }
-                        ),
-                        discarded_train_cards=merge_train_cards(
-                            self.discarded_train_cards, action.train_cards
-                        ),
-                    )
-            elif isinstance(action, gaction.TrainCardPickAction):
-                return perform_train_draw(self.turn_state, action, last_turn_started)
-            elif isinstance(action, gaction.DestinationCardPickAction):
-                return replace(
-                    self,
-                    turn_state=gturn.DestinationCardDealTurn(
-                        last_turn_started, self.turn_state.player
+        else:
+            return fast_replace(
+                self,
+                turn_state=next_turn,
+                opponent_hands=frozendict_set(
+                    self.opponent_hands,
+                    turn_state.player,
+                    fast_replace(
+                        self.opponent_hands[turn_state.player],
+                        unselected_destination_cards_count=0,
+                        destination_cards_count=len(action.selected_cards),
                     ),
-                )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.PlayerTrainCardDrawMidTurn):
-            if isinstance(action, gaction.TrainCardPickAction):
-                return perform_train_draw(
-                    self.turn_state,
-                    action,
-                    self.turn_state.last_turn_started,
-                    second_draw=True,
-                )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.PlayerDestinationCardDrawMidTurn):
-            if isinstance(action, gaction.DestinationCardSelectionAction):
-                next_turn_state: TurnState = gturn.PlayerStartTurn.make_or_end(
-                    self.turn_state.last_turn_started,
-                    self.box.next_player_map[self.turn_state.player],
-                )
-                if self.turn_state.player == self.player:
-                    return replace(
-                        self,
-                        hand=replace(
-                            self.hand,
-                            unselected_destination_cards=frozenset(),
-                            destination_cards=self.hand.destination_cards
-                            | action.selected_cards,
-                            incomplete_destination_cards=self.hand.incomplete_destination_cards
-                            | action.selected_cards,
-                        ),
-                        turn_state=next_turn_state,
-                        destination_card_pile_distribution=self.destination_card_pile_distribution
-                        | (
-                            self.hand.unselected_destination_cards
-                            - action.selected_cards
-                        ),
-                        destination_card_pile_size=self.destination_card_pile_size
-                        + len(self.hand.unselected_destination_cards)
-                        - len(action.selected_cards),
-                    )
-                else:
-                    old_hand = self.opponent_hands[self.turn_state.player]
-                    return replace(
-                        self,
-                        opponent_hands=frozendict(
-                            {
-                                **self.opponent_hands,
-                                self.turn_state.player: replace(
-                                    old_hand,
-                                    unselected_destination_cards_count=0,
-                                    destination_cards_count=old_hand.destination_cards_count
-                                    + len(action.selected_cards),
-                                ),
-                            }
-                        ),
-                        turn_state=next_turn_state,
-                        destination_card_pile_size=self.destination_card_pile_size
-                        + old_hand.unselected_destination_cards_count
-                        - len(action.selected_cards),
-                    )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.DestinationCardDealTurn):
-            if isinstance(action, gaction.DestinationCardDealAction):
-                next_turn_state = gturn.PlayerDestinationCardDrawMidTurn(
-                    self.turn_state.last_turn_started, self.turn_state.to_player
-                )
-                if self.turn_state.to_player == self.player:
-                    return replace(
-                        self,
-                        turn_state=next_turn_state,
-                        hand=replace(
-                            self.hand, unselected_destination_cards=action.cards
-                        ),
-                        destination_card_pile_distribution=self.destination_card_pile_distribution
-                        - action.cards,
-                        destination_card_pile_size=self.destination_card_pile_size
-                        - len(action.cards),
-                    )
-                else:
-                    return replace(
-                        self,
-                        turn_state=next_turn_state,
-                        opponent_hands=frozendict(
-                            {
-                                **self.opponent_hands,
-                                self.turn_state.to_player: replace(
-                                    self.opponent_hands[self.turn_state.to_player],
-                                    unselected_destination_cards_count=len(
-                                        action.cards
-                                    ),
-                                ),
-                            }
-                        ),
-                        destination_card_pile_size=self.destination_card_pile_size
-                        - len(action.cards),
-                    )
+                ),
+            )
 
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.TrainCardDealTurn):
-            if isinstance(action, gaction.TrainCardDealAction):
-                if self.turn_state.to_player is None:
-                    new_face_up_cards = merge_train_cards(
-                        self.face_up_train_cards, action.cards
-                    )
-                    if new_face_up_cards[None] >= self.box.wildcards_to_clear:
-                        return replace(
-                            self,
-                            face_up_train_cards=TrainCards(),
-                            turn_state=gturn.TrainCardDealTurn(
-                                count=self.box.face_up_train_cards,
-                                to_player=None,
-                                next_turn_state=self.turn_state.next_turn_state,
-                            ),
-                        )
-                    else:
-                        return replace(
-                            self,
-                            turn_state=self.turn_state.next_turn_state,
-                            face_up_train_cards=new_face_up_cards,
-                        )
-                else:
-                    if self.turn_state.to_player == self.player:
-                        return replace(
-                            self,
-                            turn_state=self.turn_state.next_turn_state,
-                            hand=replace(
-                                self.hand,
-                                train_cards=merge_train_cards(
-                                    self.hand.train_cards, action.cards
-                                ),
-                            ),
-                        )
-                    else:
-                        old_hand = self.opponent_hands[self.turn_state.to_player]
-                        return replace(
-                            self,
-                            turn_state=self.turn_state.next_turn_state,
-                            opponent_hands=frozendict(
-                                {
-                                    **self.opponent_hands,
-                                    self.turn_state.to_player: replace(
-                                        old_hand,
-                                        train_cards_count=old_hand.train_cards_count
-                                        + action.cards.total,
-                                    ),
-                                }
-                            ),
-                        )
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.GameOverTurn):
-            if isinstance(action, gaction.PassAction):
-                return self
-            else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.InitialTurn):
-            if isinstance(action, gaction.InitialDealAction):
-                return replace(
-                    self,
-                    hand=replace(
-                        self.hand,
-                        unselected_destination_cards=action.destination_cards[
-                            self.player
-                        ],
-                        train_cards=action.train_cards[self.player],
+    def _next_from_pass(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.PassAction
+    ) -> ObservedState:
+        return fast_replace(
+            self,
+            turn_state=gturn.PlayerStartTurn.make_or_end(
+                self._last_turn_started(turn_state),
+                self.box.next_player_map[turn_state.player],
+            ),
+        )
+
+    def _next_from_build(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.BuildAction
+    ) -> ObservedState:
+        last_turn_started = self._last_turn_started(turn_state)
+        new_cluster = self.built_clusters[turn_state.player].connect(
+            *action.route.cities
+        )
+        route_points = self.box.route_point_values[action.route.length]
+        if turn_state.player == self.player:
+            (
+                points_so_far,
+                complete_destination_cards,
+                incomplete_destination_cards,
+            ) = _complete_destination_cards(
+                new_cluster,
+                self.hand.points_so_far + route_points,
+                self.hand.complete_destination_cards,
+                self.hand.incomplete_destination_cards,
+            )
+            return fast_replace(
+                self,
+                turn_state=gturn.PlayerStartTurn.make_or_end(
+                    last_turn_started,
+                    self.box.next_player_map[turn_state.player],
+                ),
+                built_routes=frozendict_set(
+                    self.built_routes, action.route, turn_state.player
+                ),
+                built_clusters=frozendict_set(
+                    self.built_clusters, turn_state.player, new_cluster
+                ),
+                hand=fast_replace(
+                    self.hand,
+                    train_cards=subtract_train_cards(
+                        self.hand.train_cards, action.train_cards
+                    )[0],
+                    remaining_trains=self.hand.remaining_trains - action.route.length,
+                    points_so_far=points_so_far,
+                    complete_destination_cards=complete_destination_cards,
+                    incomplete_destination_cards=incomplete_destination_cards,
+                ),
+                discarded_train_cards=merge_train_cards(
+                    self.discarded_train_cards, action.train_cards
+                ),
+            )
+        else:
+            old_hand = self.opponent_hands[turn_state.player]
+            new_known_train_cards, leftovers = subtract_train_cards(
+                old_hand.known_train_cards, action.train_cards
+            )
+            (
+                points_so_far,
+                complete_destination_cards,
+                incomplete_destination_cards,
+            ) = _complete_destination_cards(
+                new_cluster,
+                old_hand.known_points_so_far + route_points,
+                old_hand.known_complete_destination_cards,
+                old_hand.known_incomplete_destination_cards,
+            )
+            return fast_replace(
+                self,
+                turn_state=gturn.PlayerStartTurn.make_or_end(
+                    last_turn_started,
+                    self.box.next_player_map[turn_state.player],
+                ),
+                built_routes=frozendict_set(
+                    self.built_routes, action.route, turn_state.player
+                ),
+                built_clusters=frozendict_set(
+                    self.built_clusters, turn_state.player, new_cluster
+                ),
+                opponent_hands=frozendict_set(
+                    self.opponent_hands,
+                    turn_state.player,
+                    fast_replace(
+                        old_hand,
+                        known_train_cards=new_known_train_cards,
+                        train_cards_count=old_hand.train_cards_count
+                        - action.route.length,
+                        remaining_trains=old_hand.remaining_trains
+                        - action.route.length,
+                        known_points_so_far=points_so_far,
+                        known_complete_destination_cards=complete_destination_cards,
+                        known_incomplete_destination_cards=incomplete_destination_cards,
                     ),
-                    opponent_hands=frozendict(
-                        {
-                            player: replace(
-                                hand,
-                                unselected_destination_cards_count=len(
-                                    action.destination_cards[player]
-                                ),
-                                train_cards_count=action.train_cards[player].total,
-                            )
-                            for player, hand in self.opponent_hands.items()
-                        }
+                ),
+                discarded_train_cards=merge_train_cards(
+                    self.discarded_train_cards, action.train_cards
+                ),
+            )
+
+    def _next_from_first_train_card_pick(
+        self, turn_state: gturn.PlayerStartTurn, action: gaction.TrainCardPickAction
+    ) -> ObservedState:
+        return self._perform_train_draw(
+            turn_state, action, self._last_turn_started(turn_state)
+        )
+
+    def _next_from_destination_card_pick(
+        self,
+        turn_state: gturn.PlayerStartTurn,
+        action: gaction.DestinationCardPickAction,
+    ) -> ObservedState:
+        return fast_replace(
+            self,
+            turn_state=gturn.DestinationCardDealTurn.intern(
+                self._last_turn_started(turn_state), turn_state.player
+            ),
+        )
+
+    def _next_from_second_train_card_pick(
+        self,
+        turn_state: gturn.PlayerTrainCardDrawMidTurn,
+        action: gaction.TrainCardPickAction,
+    ) -> ObservedState:
+        return self._perform_train_draw(
+            turn_state,
+            action,
+            turn_state.last_turn_started,
+            second_draw=True,
+        )
+
+    def _next_from_dealt_destination_selection(
+        self,
+        turn_state: gturn.PlayerDestinationCardDrawMidTurn,
+        action: gaction.DestinationCardSelectionAction,
+    ) -> ObservedState:
+        next_turn_state: TurnState = gturn.PlayerStartTurn.make_or_end(
+            turn_state.last_turn_started,
+            self.box.next_player_map[turn_state.player],
+        )
+        if turn_state.player == self.player:
+            return fast_replace(
+                self,
+                hand=fast_replace(
+                    self.hand,
+                    unselected_destination_cards=frozenset(),
+                    destination_cards=self.hand.destination_cards
+                    | action.selected_cards,
+                    incomplete_destination_cards=self.hand.incomplete_destination_cards
+                    | action.selected_cards,
+                ),
+                turn_state=next_turn_state,
+                destination_card_pile_distribution=self.destination_card_pile_distribution
+                | (self.hand.unselected_destination_cards - action.selected_cards),
+                destination_card_pile_size=self.destination_card_pile_size
+                + len(self.hand.unselected_destination_cards)
+                - len(action.selected_cards),
+            )
+        else:
+            old_hand = self.opponent_hands[turn_state.player]
+            return fast_replace(
+                self,
+                opponent_hands=frozendict_set(
+                    self.opponent_hands,
+                    turn_state.player,
+                    fast_replace(
+                        old_hand,
+                        unselected_destination_cards_count=0,
+                        destination_cards_count=old_hand.destination_cards_count
+                        + len(action.selected_cards),
                     ),
-                    destination_card_pile_distribution=self.destination_card_pile_distribution
-                    - action.destination_cards[self.player],
-                    destination_card_pile_size=self.destination_card_pile_size
-                    - sum(map(len, action.destination_cards.values())),
-                    train_card_pile_distribution=subtract_train_cards(
-                        self.train_card_pile_distribution,
-                        action.train_cards[self.player],
-                    )[0],
-                    turn_state=gturn.PlayerInitialDestinationCardChoiceTurn(
-                        self.box.players[0]
+                ),
+                turn_state=next_turn_state,
+                destination_card_pile_size=self.destination_card_pile_size
+                + old_hand.unselected_destination_cards_count
+                - len(action.selected_cards),
+            )
+
+    def _next_from_destination_card_deal(
+        self,
+        turn_state: gturn.DestinationCardDealTurn,
+        action: gaction.DestinationCardDealAction,
+    ) -> ObservedState:
+        next_turn_state = gturn.PlayerDestinationCardDrawMidTurn.intern(
+            turn_state.last_turn_started, turn_state.to_player
+        )
+        if turn_state.to_player == self.player:
+            return fast_replace(
+                self,
+                turn_state=next_turn_state,
+                hand=fast_replace(self.hand, unselected_destination_cards=action.cards),
+                destination_card_pile_distribution=self.destination_card_pile_distribution
+                - action.cards,
+                destination_card_pile_size=self.destination_card_pile_size
+                - len(action.cards),
+            )
+        else:
+            return fast_replace(
+                self,
+                turn_state=next_turn_state,
+                opponent_hands=frozendict_set(
+                    self.opponent_hands,
+                    turn_state.to_player,
+                    fast_replace(
+                        self.opponent_hands[turn_state.to_player],
+                        unselected_destination_cards_count=len(action.cards),
                     ),
-                    face_up_train_cards=merge_train_cards(
-                        self.face_up_train_cards, action.face_up_train_cards
+                ),
+                destination_card_pile_size=self.destination_card_pile_size
+                - len(action.cards),
+            )
+
+    def _next_from_train_card_deal(
+        self, turn_state: gturn.TrainCardDealTurn, action: gaction.TrainCardDealAction
+    ) -> ObservedState:
+        if turn_state.to_player is None:
+            new_face_up_cards = merge_train_cards(
+                self.face_up_train_cards, action.cards
+            )
+            if new_face_up_cards[None] >= self.box.wildcards_to_clear:
+                return fast_replace(
+                    self,
+                    face_up_train_cards=TrainCards(),
+                    turn_state=gturn.TrainCardDealTurn.intern(
+                        count=self.box.face_up_train_cards,
+                        to_player=None,
+                        next_turn_state=turn_state.next_turn_state,
                     ),
                 )
             else:
-                raise unexpected_action_error
-        elif isinstance(self.turn_state, gturn.RevealFinalDestinationCardsTurn):
-            if isinstance(action, gaction.RevealFinalDestinationCardsAction):
-                return replace(
-                    self, revealed_destination_cards=action.destination_cards
+                return fast_replace(
+                    self,
+                    turn_state=turn_state.next_turn_state,
+                    face_up_train_cards=new_face_up_cards,
                 )
-            else:
-                raise unexpected_action_error
+        elif turn_state.to_player == self.player:
+            return fast_replace(
+                self,
+                turn_state=turn_state.next_turn_state,
+                hand=fast_replace(
+                    self.hand,
+                    train_cards=merge_train_cards(self.hand.train_cards, action.cards),
+                ),
+            )
         else:
-            assert_never(self.turn_state)
+            old_hand = self.opponent_hands[turn_state.to_player]
+            return fast_replace(
+                self,
+                turn_state=turn_state.next_turn_state,
+                opponent_hands=frozendict_set(
+                    self.opponent_hands,
+                    turn_state.to_player,
+                    fast_replace(
+                        old_hand,
+                        train_cards_count=old_hand.train_cards_count
+                        + action.cards.total,
+                    ),
+                ),
+            )
 
-    def get_legal_actions(self) -> Generator[AbstractState.LegalAction, None, None]:
-        def get_train_card_draw_actions(
-            second: bool = False,
-        ) -> Generator[ObservedState.LegalAction, None, None]:
-            for color, count in self.face_up_train_cards.items():
-                if count > 0 and not (second and color is None):
-                    yield ObservedState.LegalAction(
-                        gaction.TrainCardPickAction(True, color)
+    def _next_from_game_over(
+        self, turn_state: gturn.GameOverTurn, action: gaction.PassAction
+    ) -> ObservedState:
+        return self
+
+    def _next_from_initial_deal(
+        self, turn_state: gturn.InitialTurn, action: gaction.InitialDealAction
+    ) -> ObservedState:
+        return fast_replace(
+            self,
+            hand=fast_replace(
+                self.hand,
+                unselected_destination_cards=action.destination_cards[self.player],
+                train_cards=action.train_cards[self.player],
+            ),
+            opponent_hands=frozendict(
+                {
+                    player: fast_replace(
+                        hand,
+                        unselected_destination_cards_count=len(
+                            action.destination_cards[player]
+                        ),
+                        train_cards_count=action.train_cards[player].total,
                     )
-            yield ObservedState.LegalAction(gaction.TrainCardPickAction(False, None))
+                    for player, hand in self.opponent_hands.items()
+                }
+            ),
+            destination_card_pile_distribution=self.destination_card_pile_distribution
+            - action.destination_cards[self.player],
+            destination_card_pile_size=self.destination_card_pile_size
+            - sum(map(len, action.destination_cards.values())),
+            train_card_pile_distribution=subtract_train_cards(
+                self.train_card_pile_distribution,
+                action.train_cards[self.player],
+            )[0],
+            turn_state=gturn.PlayerInitialDestinationCardChoiceTurn.intern(
+                self.box.players[0]
+            ),
+            face_up_train_cards=merge_train_cards(
+                self.face_up_train_cards, action.face_up_train_cards
+            ),
+        )
 
+    def _next_from_reveal_final_destination_cards(
+        self,
+        turn_state: gturn.RevealFinalDestinationCardsTurn,
+        action: gaction.RevealFinalDestinationCardsAction,
+    ) -> ObservedState:
+        return fast_replace(self, revealed_destination_cards=action.destination_cards)
+
+    # next_state dispatches on the exact types of the turn state and the action, like
+    # KnownState does. A pair that is missing from the transitions is an unexpected
+    # action.
+    _transitions: ClassVar[
+        Dict[Tuple[type, type], Callable[[ObservedState, Any, Any], ObservedState]]
+    ] = {
+        (
+            gturn.PlayerInitialDestinationCardChoiceTurn,
+            gaction.DestinationCardSelectionAction,
+        ): _next_from_initial_destination_selection,
+        (gturn.PlayerStartTurn, gaction.PassAction): _next_from_pass,
+        (gturn.PlayerStartTurn, gaction.BuildAction): _next_from_build,
+        (
+            gturn.PlayerStartTurn,
+            gaction.TrainCardPickAction,
+        ): _next_from_first_train_card_pick,
+        (
+            gturn.PlayerStartTurn,
+            gaction.DestinationCardPickAction,
+        ): _next_from_destination_card_pick,
+        (
+            gturn.PlayerTrainCardDrawMidTurn,
+            gaction.TrainCardPickAction,
+        ): _next_from_second_train_card_pick,
+        (
+            gturn.PlayerDestinationCardDrawMidTurn,
+            gaction.DestinationCardSelectionAction,
+        ): _next_from_dealt_destination_selection,
+        (
+            gturn.DestinationCardDealTurn,
+            gaction.DestinationCardDealAction,
+        ): _next_from_destination_card_deal,
+        (
+            gturn.TrainCardDealTurn,
+            gaction.TrainCardDealAction,
+        ): _next_from_train_card_deal,
+        (gturn.GameOverTurn, gaction.PassAction): _next_from_game_over,
+        (gturn.InitialTurn, gaction.InitialDealAction): _next_from_initial_deal,
+        (
+            gturn.RevealFinalDestinationCardsTurn,
+            gaction.RevealFinalDestinationCardsAction,
+        ): _next_from_reveal_final_destination_cards,
+    }
+
+    def _generate_legal_actions(
+        self,
+    ) -> Generator[AbstractState.LegalAction, None, None]:
         def get_build_actions(
             known_cards: TrainCards, unknown_cards: int
         ) -> Generator[ObservedState.LegalAction, None, None]:
-            for route in self.box.board.routes:
-                if (
-                    route not in self.built_routes
-                    and route.length <= self.hand.remaining_trains
-                    and (
-                        (
-                            len(self.box.players)
-                            >= self.box.double_routes_player_minimum
-                            and not any(
-                                self.built_routes.get(double, None) == self.player
-                                for double in self.box.board.double_routes[route]
-                            )
-                        )
-                        or not any(
-                            double in self.built_routes
-                            for double in self.box.board.double_routes[route]
-                        )
+            # the unknown cards and the pile are the same for every route, so the
+            # probability of having each set of cards only needs working out once,
+            # though routes of the same length and color share the sets
+            pile_distribution = self.train_card_pile_distribution
+            probabilities: Dict[TrainCards, float] = {}
+
+            def build_action(
+                route: Route, cards_to_build: TrainCards
+            ) -> ObservedState.LegalAction:
+                probability = probabilities.get(cards_to_build)
+                if probability is None:
+                    probability = probability_of_having_cards(
+                        cards_to_build, unknown_cards, pile_distribution
                     )
-                ):
-                    if route.color is None:
-                        colors: Iterable[Color] = self.box.colors
-                    else:
-                        colors = [route.color]
-
-                    for color in colors:
-                        max_color_cards = min(
-                            known_cards[color] + unknown_cards, route.length
-                        )
-                        max_wildcards = min(
-                            known_cards[None] + unknown_cards, route.length - 1
-                        )
-                        for color_cards in range(
-                            route.length - max_wildcards, max_color_cards + 1
-                        ):
-                            cards_to_build = TrainCards(
-                                {color: color_cards, None: route.length - color_cards}
-                            )
-                            yield ObservedState.LegalAction(
-                                gaction.BuildAction(route, cards_to_build),
-                                probability=probability_of_having_cards(
-                                    cards_to_build,
-                                    unknown_cards,
-                                    self.train_card_pile_distribution,
-                                ),
-                            )
-                    if known_cards[None] + unknown_cards >= route.length:
-                        cards_to_build = TrainCards({None: route.length})
-                        yield ObservedState.LegalAction(
-                            gaction.BuildAction(route, cards_to_build),
-                            probability=probability_of_having_cards(
-                                cards_to_build,
-                                unknown_cards,
-                                self.train_card_pile_distribution,
+                    probabilities[cards_to_build] = probability
+                return ObservedState.LegalAction(
+                    gaction.BuildAction(route, cards_to_build),
+                    probability=probability,
+                )
+
+            available_wildcards = known_cards[None] + unknown_cards
+            for route in self._buildable_routes(
+                self.box, self.built_routes, self.player, self.hand.remaining_trains
+            ):
+                length = route.length
+                if route.color is None:
+                    colors: Iterable[Color] = self.box.colors
+                else:
+                    colors = [route.color]
+
+                max_wildcards = min(available_wildcards, length - 1)
+                for color in colors:
+                    max_color_cards = min(known_cards[color] + unknown_cards, length)
+                    for color_cards in range(
+                        length - max_wildcards, max_color_cards + 1
+                    ):
+                        yield build_action(
+                            route,
+                            TrainCards.of_card(
+                                color, color_cards, wildcards=length - color_cards
                             ),
                         )
+                if available_wildcards >= length:
+                    yield build_action(route, TrainCards.of_card(None, length))
 
         def get_train_card_deal_actions(
             count: int, distribution: TrainCards
@@ -668,23 +760,6 @@ class ObservedState(AbstractState):
                     probability=prob,
                 )
 
-        def get_final_destination_cards(
-            revealed_so_far: Optional[Cons[Tuple[Player, FrozenSet[DestinationCard]]]],
-            remaining_counts: Optional[Cons[Tuple[Player, int]]],
-            pile: FrozenSet[DestinationCard],
-        ) -> Generator[Dict[Player, FrozenSet[DestinationCard]], None, None]:
-            if remaining_counts is None:
-                yield dict(Cons.iterate(revealed_so_far))
-            else:
-                player, count = remaining_counts.head
-                for cards in itertools.combinations(pile, count):
-                    cards_set = frozenset(cards)
-                    yield from get_final_destination_cards(
-                        Cons((player, cards_set), revealed_so_far),
-                        remaining_counts.rest,
-                        pile=cards_set,
-                    )
-
         if isinstance(self.turn_state, gturn.InitialTurn):
             return  # TODO: probably unnecessary to implement
         elif isinstance(
@@ -737,7 +812,7 @@ class ObservedState(AbstractState):
         elif isinstance(self.turn_state, gturn.PlayerStartTurn):
             if self.destination_card_pile_size > 0:
                 yield ObservedState.LegalAction(gaction.DestinationCardPickAction())
-            yield from get_train_card_draw_actions()
+            yield from train_card_draw_legal_actions(self.face_up_train_cards)
             if self.player == self.turn_state.player:
                 yield from get_build_actions(self.hand.train_cards, 0)
             else:
@@ -749,7 +824,9 @@ class ObservedState(AbstractState):
                     ].known_train_cards.total,
                 )
         elif isinstance(self.turn_state, gturn.PlayerTrainCardDrawMidTurn):
-            yield from get_train_card_draw_actions(second=True)
+            yield from train_card_draw_legal_actions(
+                self.face_up_train_cards, second=True
+            )
         elif isinstance(self.turn_state, gturn.DestinationCardDealTurn):
             cards = min(
                 self.box.dealt_destination_cards_range[1],
@@ -781,20 +858,26 @@ class ObservedState(AbstractState):
                 )
                 pile_size -= hand.destination_cards_count
 
-            for destination_card_set in get_final_destination_cards(
-                Cons((self.player, self.hand.destination_cards), None),
-                Cons.make(
-                    (
-                        player,
-                        hand.destination_cards_count
-                        - len(hand.known_destination_cards),
-                    )
-                    for player, hand in self.opponent_hands.items()
-                ),
-                self.destination_card_pile_distribution,
+            opponents = list(self.opponent_hands)
+            known_masks = [
+                self.box.destination_card_mask(
+                    self.opponent_hands[opponent].known_destination_cards
+                )
+                for opponent in opponents
+            ]
+            for masks in _enumerate_final_assignments(
+                [
+                    self.opponent_hands[opponent].destination_cards_count
+                    - len(self.opponent_hands[opponent].known_destination_cards)
+                    for opponent in opponents
+                ],
+                self.box.destination_card_mask(self.destination_card_pile_distribution),
             ):
-                for opponent, hand in self.opponent_hands.items():
-                    destination_card_set[opponent] |= hand.known_destination_cards
+                destination_card_set = {self.player: self.hand.destination_cards}
+                for opponent, known_mask, mask in zip(opponents, known_masks, masks):
+                    destination_card_set[opponent] = self.box.destination_cards_of_mask(
+                        mask | known_mask
+                    )
                 yield ObservedState.LegalAction(
                     gaction.RevealFinalDestinationCardsAction(
                         frozendict(destination_card_set)
@@ -863,43 +946,42 @@ class ObservedState(AbstractState):
                         - len(hand.known_unselected_destination_cards),
                         destination_card_pile_after_destination_card_deal,
                     ):
-                        yield replace(
+                        yield fast_replace(
                             self,
                             train_card_pile_distribution=subtract_train_cards(
                                 self.train_card_pile_distribution, train_cards
                             )[0],
                             destination_card_pile_distribution=destination_card_pile_after_destination_card_deal
                             - unselected_destination_cards,
-                            opponent_hands=frozendict(
-                                {
-                                    **self.opponent_hands,
-                                    player: replace(
-                                        hand,
-                                        known_train_cards=merge_train_cards(
-                                            hand.known_train_cards, train_cards
-                                        ),
-                                        known_destination_cards=hand.known_destination_cards
-                                        | destination_cards,
-                                        known_unselected_destination_cards=hand.known_unselected_destination_cards
-                                        | unselected_destination_cards,
-                                        known_complete_destination_cards=hand.known_complete_destination_cards
-                                        | {
-                                            card
-                                            for card in destination_cards
-                                            if self.built_clusters[player].is_connected(
-                                                card.cities
-                                            )
-                                        },
-                                        known_incomplete_destination_cards=hand.known_incomplete_destination_cards
-                                        | {
-                                            card
-                                            for card in destination_cards
-                                            if not self.built_clusters[
-                                                player
-                                            ].is_connected(card.cities)
-                                        },
+                            opponent_hands=frozendict_set(
+                                self.opponent_hands,
+                                player,
+                                fast_replace(
+                                    hand,
+                                    known_train_cards=merge_train_cards(
+                                        hand.known_train_cards, train_cards
                                     ),
-                                }
+                                    known_destination_cards=hand.known_destination_cards
+                                    | destination_cards,
+                                    known_unselected_destination_cards=hand.known_unselected_destination_cards
+                                    | unselected_destination_cards,
+                                    known_complete_destination_cards=hand.known_complete_destination_cards
+                                    | {
+                                        card
+                                        for card in destination_cards
+                                        if self.built_clusters[player].is_connected(
+                                            card.cities
+                                        )
+                                    },
+                                    known_incomplete_destination_cards=hand.known_incomplete_destination_cards
+                                    | {
+                                        card
+                                        for card in destination_cards
+                                        if not self.built_clusters[player].is_connected(
+                                            card.cities
+                                        )
+                                    },
+                                ),
                             ),
                         ), train_cards_prob * weighted_destination_cards_prob * unselected_destination_cards_prob
         else:
@@ -919,3 +1001,10 @@ class ObservedState(AbstractState):
             )
         else:
             return True
+
+
+# successors are cached like a transposition table, for the same reasons as those of
+# KnownState, and ObservedState.clear_caches empties the cache
+@functools.lru_cache(maxsize=2 ** 14)
+def _cached_next_state(state: ObservedState, action: Action) -> ObservedState:
+    return state._compute_next_state(action)
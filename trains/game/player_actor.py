@@ -1,9 +1,20 @@
 from __future__ import annotations
 
-import argparse
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional, Callable, FrozenSet, TypeVar, Type, Any, Generic
+from typing import (
+    Optional,
+    Callable,
+    FrozenSet,
+    TypeVar,
+    Type,
+    Any,
+    Generic,
+    ClassVar,
+    Dict,
+    List,
+    Tuple,
+)
 
 import trains.game.action as gaction
 import trains.game.turn as gturn
@@ -62,39 +73,41 @@ class PlayerActor(Generic[State], Actor, ABC):
         self.turn_state = self.state.turn_state
 
     def print_state(self) -> None:
+        hand = self.state.player_hand(self.player)
+        color_display = self.box.color_display
         colors = ", ".join(
-            f"{count} {'wildcard' if color is None else color.name}"
-            for color, count in self.state.player_hand(self.player).train_cards.items()
+            f"{count} {color_display[color]}"
+            for color, count in hand.train_cards.items()
             if count > 0
         )
         print(f"Train cards in hand: {colors}")
 
         print(
-            f"Destination cards: {', '.join(f'{card.cities_list[0].name}->{card.cities_list[1].name} for {card.value}' for card in self.state.player_hand(self.player).destination_cards)}"
+            f"Destination cards: {', '.join(card.display for card in hand.destination_cards)}"
         )
 
-        if len(self.state.player_hand(self.player).unselected_destination_cards) > 0:
+        if len(hand.unselected_destination_cards) > 0:
             print(
-                f"Destination cards to select from: {', '.join(f'{card.cities_list[0].name}->{card.cities_list[1].name} for {card.value}' for card in self.state.player_hand(self.player).unselected_destination_cards)}"
+                f"Destination cards to select from: {', '.join(card.display for card in hand.unselected_destination_cards)}"
             )
 
         colors = ", ".join(
-            f"{count} {'wildcard' if color is None else color.name}"
+            f"{count} {color_display[color]}"
             for color, count in self.state.face_up_train_cards.items()
             if count > 0
         )
         print(f"Face up train cards: {colors}")
 
-        for player, hand in self.state.player_hands.items():
+        for player, opponent_hand in self.state.player_hands.items():
             if player != self.player:
                 colors = ", ".join(
-                    f"{count} {'wildcard' if color is None else color.name}"
-                    for color, count in hand.known_train_cards.items()
+                    f"{count} {color_display[color]}"
+                    for color, count in opponent_hand.known_train_cards.items()
                     if count > 0
                 )
                 print(f"{player.name} cards in hand: {colors}")
                 print(
-                    f"{player.name} destination cards: {', '.join(f'{card.cities_list[0].name}->{card.cities_list[1].name} for {card.value}' for card in hand.known_destination_cards)}"
+                    f"{player.name} destination cards: {', '.join(card.display for card in opponent_hand.known_destination_cards)}"
                 )
 
 
@@ -107,16 +120,16 @@ class UserActor(PlayerActor):
                 print(f"Error parsing action: {error}")
 
     def observe_action(self, action: Action) -> None:
-        if isinstance(self.turn_state, gturn.PlayerTurn):
+        if self.should_print_state and isinstance(self.turn_state, gturn.PlayerTurn):
             if isinstance(action, gaction.BuildAction):
-                cities = list(action.route.cities)
+                color_display = self.box.color_display
                 colors = " and ".join(
-                    f"{count} {'wildcard' if color is None else color.name}"
+                    f"{count} {color_display[color]}"
                     for color, count in action.train_cards.items()
                     if count > 0
                 )
                 print(
-                    f"{self.turn_state.player.name} built {'grey' if action.route.color is None else action.route.color.name} route from {cities[0].name} to {cities[1].name} built using {colors}"
+                    f"{self.turn_state.player.name} built {action.route.display} built using {colors}"
                 )
             elif isinstance(action, gaction.DestinationCardSelectionAction):
                 print(
@@ -139,132 +152,165 @@ class UserActor(PlayerActor):
 
         super().observe_action(action)
 
-    @property  # type: ignore
-    def _parser(self) -> Callable[[str], Action]:
-        def parse_color(color_str: str) -> Optional[Color]:
-            if color_str == "wildcard":
-                return None
-
-            color = Color(color_str)
-            if color not in self.box.colors:
-                raise ParserException(f"Invalid color '{color_str}'")
-            return color
-
-        def parse_city(city_str: str) -> City:
-            city = City(city_str)
-            if city not in self.box.board.cities:
-                raise ParserException(f"Invalid city '{city_str}'")
-            return city
-
-        def parse_destination_card(route_str: str) -> FrozenSet[City]:
-            city_strs = route_str.split(",")
-            if len(city_strs) != 2:
+    def _parse_color(self, color_str: str) -> Optional[Color]:
+        if color_str == "wildcard":
+            return None
+
+        color = Color(color_str)
+        if color not in self.box.colors:
+            raise ParserException(f"Invalid color '{color_str}'")
+        return color
+
+    def _parse_city(self, city_str: str) -> City:
+        city = City(city_str)
+        if city not in self.box.board.cities:
+            raise ParserException(f"Invalid city '{city_str}'")
+        return city
+
+    def _parse_destination_card(self, route_str: str) -> FrozenSet[City]:
+        city_strs = route_str.split(",")
+        if len(city_strs) != 2:
+            raise ParserException(
+                "Expected two comma-separated cities, like 'New-York,San-Francisco', for each destination card"
+            )
+        return frozenset(map(self._parse_city, city_strs))
+
+    def _parse_build(self, args: List[str], options: Dict[str, str]) -> Action:
+        if len(args) != 2:
+            raise ParserException("Expected the two cities of the route to build")
+        city_a, city_b = map(self._parse_city, args)
+        try:
+            wildcards = int(options.get("wildcards", "0"))
+        except ValueError:
+            raise ParserException(
+                f"Invalid number of wildcards '{options['wildcards']}'"
+            )
+        color = self._parse_color(options["color"]) if "color" in options else None
+
+        board = self.box.board
+        cities = board.city_pairs.get((city_a, city_b))
+        if cities is None:
+            raise ParserException(f"No route from '{city_a}' to '{city_b}' exists")
+        routes = board.cities_to_routes[cities]
+        if len(routes) == 1:
+            route = routes[0]
+        else:
+            double_color = (
+                self._parse_color(options["double-color"])
+                if "double-color" in options
+                else None
+            )
+            double_route = board.cities_to_routes_by_color[cities].get(double_color)
+            if double_route is None:
                 raise ParserException(
-                    "Expected two comma-separated cities, like 'New-York,San-Francisco', for each destination card"
+                    f"No route from '{city_a}' to '{city_b}' exists with {'gray' if double_color is None else double_color.name} color"
                 )
-            return frozenset(map(parse_city, city_strs))
-
-        parser = argparse.ArgumentParser()
-        subparsers = parser.add_subparsers(dest="action_name")
-
-        # DestinationCardSelectionAction,
-
-        build_parser = subparsers.add_parser("build")
-        build_parser.add_argument("city1", type=parse_city)
-        build_parser.add_argument("city2", type=parse_city)
-        build_parser.add_argument("--wildcards", type=int, default=0)
-        build_parser.add_argument("--color", type=parse_color, default=None)
-        build_parser.add_argument("--double-color", type=parse_color, default=None)
-
-        draw_parser = subparsers.add_parser("draw")
-        draw_parser.add_argument("color", type=parse_color, nargs="?", default=False)
-
-        _ = subparsers.add_parser("draw-destinations")
-
-        pick_parser = subparsers.add_parser("pick")
-        pick_parser.add_argument(
-            "destination_cards", nargs="+", type=parse_destination_card
-        )
+            route = double_route
+        if route.color is None and color is None and wildcards < route.length:
+            raise ParserException(
+                "Route is gray; a color must be specified to build with if not using all wildcards"
+            )
+        # the cards are made from their counts so that equal costs are the same object
+        if color is None:
+            train_cards = TrainCards.of_card(None, wildcards)
+        else:
+            train_cards = TrainCards.of_card(color, route.length - wildcards, wildcards)
+        return gaction.BuildAction(route, train_cards)
 
-        _ = subparsers.add_parser("pass")
+    def _parse_draw(self, args: List[str], options: Dict[str, str]) -> Action:
+        if len(args) == 0:
+            return gaction.TrainCardPickAction(
+                draw_known=False, selected_card_if_known=None
+            )
+        elif len(args) == 1:
+            return gaction.TrainCardPickAction(
+                draw_known=True, selected_card_if_known=self._parse_color(args[0])
+            )
+        else:
+            raise ParserException("Expected at most one color to draw")
+
+    def _parse_draw_destinations(
+        self, args: List[str], options: Dict[str, str]
+    ) -> Action:
+        _expect_no_arguments(args)
+        return gaction.DestinationCardPickAction()
+
+    def _parse_pick(self, args: List[str], options: Dict[str, str]) -> Action:
+        if len(args) == 0:
+            raise ParserException("Expected at least one destination card to pick")
+        cards = []
+        cities_to_card = self.state.player_hand(self.player).cities_to_card
+        for cities in map(self._parse_destination_card, args):
+            if cities in cities_to_card:
+                cards.append(cities_to_card[cities])
+            else:
+                cities_list = list(cities)
+                raise ParserException(
+                    f"No destination card from '{cities_list[0].name}' to '{cities_list[1].name}' in hand to pick from"
+                )
+        return gaction.DestinationCardSelectionAction(frozenset(cards))
+
+    def _parse_pass(self, args: List[str], options: Dict[str, str]) -> Action:
+        _expect_no_arguments(args)
+        return gaction.PassAction()
+
+    # the parser for each action name, along with the options the action takes
+    _action_parsers: ClassVar[
+        Dict[
+            str,
+            Tuple[
+                Callable[[UserActor, List[str], Dict[str, str]], Action],
+                FrozenSet[str],
+            ],
+        ]
+    ] = {
+        "build": (_parse_build, frozenset(["wildcards", "color", "double-color"])),
+        "draw": (_parse_draw, frozenset()),
+        "draw-destinations": (_parse_draw_destinations, frozenset()),
+        "pick": (_parse_pick, frozenset()),
+        "pass": (_parse_pass, frozenset()),
+    }
 
-        def parse(action_str: str) -> Action:
-            try:
-                cmd = parser.parse_args(action_str.split())
-            except (Exception, SystemExit) as error:
-                raise ParserException(error)
+    def parse_action(self, action_str: str) -> Action:
+        tokens = action_str.split()
+        if len(tokens) == 0:
+            raise ParserException(
+                f"Expected an action, one of {', '.join(self._action_parsers)}"
+            )
+        action_name, *arguments = tokens
+        if action_name not in self._action_parsers:
+            raise ParserException(f"Unexpected action '{action_name}'")
+        parse, option_names = self._action_parsers[action_name]
+        args, options = _split_options(arguments, option_names)
+        return parse(self, args, options)
 
-            if cmd.action_name == "build":
-                cities = frozenset([cmd.city1, cmd.city2])
-                cities_list = list(cities)
-                routes = self.box.board.cities_to_routes[cities]
-                color: Optional[Color] = cmd.color
-                if len(routes) == 0:
-                    raise ParserException(
-                        f"No route from '{cities_list[0]}' to '{cities_list[1]}' exists"
-                    )
-                else:
-                    if len(routes) == 1:
-                        route = routes[0]
-                    else:
-                        double_color: Optional[Color] = cmd.double_color
-                        filtered_routes = list(
-                            route for route in routes if route.color == double_color
-                        )
-                        if len(filtered_routes) == 0:
-                            raise ParserException(
-                                f"No route from '{cities_list[0]}' to '{cities_list[1]}' exists with {'gray' if double_color is None else double_color.name} color"
-                            )
-                        route = filtered_routes[0]
-                    if (
-                        route.color is None
-                        and color is None
-                        and cmd.wildcards < route.length
-                    ):
-                        raise ParserException(
-                            "Route is gray; a color must be specified to build with if not using all wildcards"
-                        )
-                    return gaction.BuildAction(
-                        route,
-                        TrainCards(
-                            {color: route.length - cmd.wildcards, None: cmd.wildcards}
-                        ),
-                    )
 
-            elif cmd.action_name == "draw":
-                if cmd.color is False:
-                    return gaction.TrainCardPickAction(
-                        draw_known=False, selected_card_if_known=None
-                    )
-                else:
-                    return gaction.TrainCardPickAction(
-                        draw_known=True, selected_card_if_known=cmd.color
-                    )
-            elif cmd.action_name == "draw-destinations":
-                return gaction.DestinationCardPickAction()
-            elif cmd.action_name == "pick":
-                cards = []
-                cities_to_card = {
-                    card.cities: card
-                    for card in self.state.player_hand(
-                        self.player
-                    ).unselected_destination_cards
-                }
-                for cities in cmd.destination_cards:
-                    if cities in cities_to_card:
-                        cards.append(cities_to_card[cities])
-                    else:
-                        cities_list = list(cities)
-                        raise ParserException(
-                            f"No destination card from '{cities_list[0].name}' to '{cities_list[1].name}' in hand to pick from"
-                        )
-                return gaction.DestinationCardSelectionAction(frozenset(cards))
-            elif cmd.action_name == "pass":
-                return gaction.PassAction()
-            else:
-                raise ParserException(f"Unexpected action '{cmd.action_name}'")
+def _expect_no_arguments(args: List[str]) -> None:
+    if len(args) > 0:
+        raise ParserException(f"Unexpected arguments '{' '.join(args)}'")
 
-        return parse
 
-    def parse_action(self, action_str: str) -> Action:
-        return self._parser(action_str)
+def _split_options(
+    arguments: List[str], option_names: FrozenSet[str]
+) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Separate command line arguments into positional arguments and the values of the
+    options, given as either --name value or --name=value
+    """
+    args = []
+    options = {}
+    remaining = iter(arguments)
+    for argument in remaining:
+        if argument.startswith("--"):
+            name, equals, value = argument[2:].partition("=")
+            if name not in option_names:
+                raise ParserException(f"Unexpected option '--{name}'")
+            if not equals:
+                next_argument = next(remaining, None)
+                if next_argument is None:
+                    raise ParserException(f"Expected a value for option '--{name}'")
+                value = next_argument
+            options[name] = value
+        else:
+            args.append(argument)
+    return args, options
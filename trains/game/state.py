@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import functools
 import itertools
+import random
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from typing import (
     FrozenSet,
     TypeVar,
@@ -13,19 +14,20 @@ from typing import (
     Optional,
     Tuple,
     Union,
-    DefaultDict,
     Mapping,
+    Iterator,
 )
 
 import math
+import numpy as np
 from frozendict import frozendict
 
+import trains.game.action as gaction
 from trains.game.action import Action
-from trains.game.box import DestinationCard, TrainCards, Player, Box, TrainCard, Route
+from trains.game.box import DestinationCard, TrainCards, Player, Box, Route, City
 from trains.game.clusters import Clusters
 from trains.game.turn import TurnState, GameOverTurn
 from trains.mypy_util import add_slots
-from trains.util import randomly_sample_distribution
 
 
 @add_slots
@@ -42,6 +44,21 @@ class ObservedHandState:
     known_points_so_far: int
     known_complete_destination_cards: FrozenSet[DestinationCard]
     known_incomplete_destination_cards: FrozenSet[DestinationCard]
+    _hash_cached: Optional[int] = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_hash_cached", None)
+
+    def __hash__(self) -> int:
+        # like KnownHandState, the opponents' hands that don't change are shared by the
+        # following states, so only the changed hand is rehashed with a new state
+        value = self._hash_cached
+        if value is None:
+            value = hash(
+                tuple(getattr(self, f.name) for f in fields(self) if f.compare)
+            )
+            object.__setattr__(self, "_hash_cached", value)
+        return value
 
 
 @add_slots
@@ -55,6 +72,38 @@ class KnownHandState:
     points_so_far: int
     complete_destination_cards: FrozenSet[DestinationCard]
     incomplete_destination_cards: FrozenSet[DestinationCard]
+    _hash_cached: Optional[int] = field(init=False, compare=False, repr=False)
+    _cities_to_card_cached: Optional[Mapping[FrozenSet[City], DestinationCard]] = field(
+        init=False, compare=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_hash_cached", None)
+        object.__setattr__(self, "_cities_to_card_cached", None)
+
+    def __hash__(self) -> int:
+        # a hand that doesn't change is shared by the following states, so caching its
+        # hash means only the changed hands are rehashed when a new state is hashed
+        value = self._hash_cached
+        if value is None:
+            value = hash(
+                tuple(getattr(self, f.name) for f in fields(self) if f.compare)
+            )
+            object.__setattr__(self, "_hash_cached", value)
+        return value
+
+    @property
+    def cities_to_card(self) -> Mapping[FrozenSet[City], DestinationCard]:
+        """
+        The unselected destination cards, keyed by the cities they connect
+        """
+        value = self._cities_to_card_cached
+        if value is None:
+            value = frozendict(
+                (card.cities, card) for card in self.unselected_destination_cards
+            )
+            object.__setattr__(self, "_cities_to_card_cached", value)
+        return value
 
     @property
     def known_destination_cards(self) -> FrozenSet[DestinationCard]:
@@ -96,6 +145,36 @@ class KnownHandState:
 HandState = Union[ObservedHandState, KnownHandState]
 
 
+# Every entry is a few dozen (interned) deals at most, so the cache can hold the decks
+# of many searches' worth of states
+@functools.lru_cache(maxsize=2 ** 14)
+def _sample_train_card_deals(
+    cards: int, deck: TrainCards
+) -> Tuple[Tuple[TrainCards, float], ...]:
+    """
+    Estimate the probabilities of the possible deals of the given number of cards from
+    the deck by sampling. The estimate for a deck is kept, since the searches deal from
+    the same deck over and over.
+    """
+    draw_count = min(cards, deck.total)
+    if draw_count == 0:
+        return ((TrainCards(), 1.0),)
+
+    # all of the samples are drawn by numpy in one call. Its generator is seeded from
+    # random, so that seeding random still makes the deals reproducible
+    mc_count = 100
+    rng = np.random.default_rng(random.getrandbits(64))
+    samples = rng.multivariate_hypergeometric(
+        np.array(deck.counts, dtype=np.int64), draw_count, size=mc_count
+    )
+    deals, deal_counts = np.unique(samples, axis=0, return_counts=True)
+    return tuple(
+        (TrainCards.from_counts(deal.tolist()), count / mc_count)
+        for deal, count in zip(deals, deal_counts.tolist())
+    )
+
+
+@add_slots
 @dataclass(frozen=True)  # type: ignore
 class AbstractState(ABC):
     box: Box
@@ -107,6 +186,30 @@ class AbstractState(ABC):
     built_routes: frozendict[Route, Player]
     built_clusters: frozendict[Player, Clusters]
     turn_state: TurnState
+    # memoized values, filled in on first access (add_slots drops class level
+    # defaults, so these are cleared in __post_init__, which also means replace() does
+    # not carry them over to the next state)
+    _hash_cached: Optional[int] = field(init=False, compare=False, repr=False)
+    _legal_actions_cached: Optional[Tuple[AbstractState.LegalAction, ...]] = field(
+        init=False, compare=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_hash_cached", None)
+        object.__setattr__(self, "_legal_actions_cached", None)
+
+    def __hash__(self) -> int:
+        # States are used as keys by the searches and the next state caches, which hash
+        # the same state many times, so the hash is only computed once. Subclasses must
+        # reuse this explicitly, since dataclass would otherwise generate a new
+        # __hash__ for them.
+        value = self._hash_cached
+        if value is None:
+            value = hash(
+                tuple(getattr(self, f.name) for f in fields(self) if f.compare)
+            )
+            object.__setattr__(self, "_hash_cached", value)
+        return value
 
     @property
     @abstractmethod
@@ -126,6 +229,15 @@ class AbstractState(ABC):
     def next_state(self: State, action: Action) -> State:
         pass
 
+    @classmethod
+    def clear_caches(cls) -> None:
+        """
+        Drop the successors and other values cached across states of this type. The
+        caches keep the states (and so their boxes) alive for the whole process, so
+        long runs of many games should clear them between games.
+        """
+        pass
+
     @dataclass(frozen=True)
     class LegalAction:
         """
@@ -136,10 +248,53 @@ class AbstractState(ABC):
         action: Action
         probability: float = 1
 
-    @abstractmethod
+    def legal_actions(self) -> Tuple[LegalAction, ...]:
+        """
+        The legal actions from this state. The searches ask the same states for their
+        actions many times, so they are only enumerated once per state.
+        """
+        actions = self._legal_actions_cached
+        if actions is None:
+            actions = tuple(self._generate_legal_actions())
+            object.__setattr__(self, "_legal_actions_cached", actions)
+        return actions
+
     def get_legal_actions(self) -> Generator[LegalAction, None, None]:
+        yield from self.legal_actions()
+
+    @abstractmethod
+    def _generate_legal_actions(self) -> Generator[LegalAction, None, None]:
         pass
 
+    @staticmethod
+    def _buildable_routes(
+        box: Box, built_routes: Mapping[Route, Player], player: Player, max_length: int
+    ) -> Generator[Route, None, None]:
+        """
+        The routes no longer than max_length that the player may build: the ones that
+        haven't been built, and whose double routes haven't been built either (or, when
+        there are enough players for doubles, weren't built by the player)
+        """
+        built_mask = 0
+        player_mask = 0
+        for route, builder in built_routes.items():
+            bit = 1 << route.index
+            built_mask |= bit
+            if builder == player:
+                player_mask |= bit
+        blocking_mask = (
+            player_mask
+            if len(box.players) >= box.double_routes_player_minimum
+            else built_mask
+        )
+        double_route_masks = box.board.double_route_masks
+        for route in box.board.routes_up_to_length(max_length):
+            if (
+                not (built_mask >> route.index) & 1
+                and not double_route_masks[route.index] & blocking_mask
+            ):
+                yield route
+
     @abstractmethod
     def assumed_hands(
         self: State,
@@ -175,18 +330,9 @@ class AbstractState(ABC):
     ) -> Generator[Tuple[TrainCards, float], None, None]:
         # this function was very slow, so I replaced it with a monte-carlo solution
         # the original code is below
-        results: DefaultDict[TrainCards, int] = defaultdict(int)
-        mc_count = 100
-        for _ in range(mc_count):
-            result: DefaultDict[TrainCard, int] = defaultdict(int)
-            current_deck = dict(deck)
-            for _ in range(min(cards, deck.total)):
-                drawn_card = next(randomly_sample_distribution(current_deck.items(), 1))
-                current_deck[drawn_card] -= 1
-                result[drawn_card] += 1
-            results[TrainCards(result)] += 1
-        for drawn_cards, count in results.items():
-            yield drawn_cards, count / mc_count
+        # asking for more cards than are left deals the whole deck either way, so those
+        # calls share an entry in the cache
+        yield from _sample_train_card_deals(min(cards, deck.total), deck)
         return None
 
         # def _deal_train_cards_helper(
@@ -214,8 +360,13 @@ class AbstractState(ABC):
         cls, cards: int, destination_cards: FrozenSet[DestinationCard]
     ) -> Generator[Tuple[FrozenSet[DestinationCard], float], None, None]:
         prob = 1 / math.comb(len(destination_cards), cards)
-        for result_cards in itertools.combinations(destination_cards, cards):
-            yield frozenset(result_cards), prob
+        # the callers take differences of the dealt sets, so they have to be frozensets,
+        # but they are built by mapping over the combinations rather than one at a time
+        # in this generator
+        dealt: Iterator[FrozenSet[DestinationCard]] = map(
+            frozenset, itertools.combinations(destination_cards, cards)
+        )
+        yield from zip(dealt, itertools.repeat(prob))
 
     def is_game_over(self) -> bool:
         return isinstance(self.turn_state, GameOverTurn)
@@ -224,4 +375,22 @@ class AbstractState(ABC):
         return max(self.player_hands.items(), key=lambda p: p[1].known_points_so_far)[0]
 
 
+# The face up cards only take a few distinct values over a game, and the same values
+# come up throughout a search, so the draw actions for each are built once and shared
+# by every state showing them.
+@functools.lru_cache(maxsize=2 ** 10)
+def train_card_draw_legal_actions(
+    face_up_train_cards: TrainCards, second: bool = False
+) -> Tuple[AbstractState.LegalAction, ...]:
+    """
+    The actions for drawing a train card, given the face up cards. A face up wildcard
+    can't be taken as the second card of a turn.
+    """
+    return tuple(
+        AbstractState.LegalAction(gaction.TrainCardPickAction(True, color))
+        for color, count in face_up_train_cards.items()
+        if count > 0 and not (second and color is None)
+    ) + (AbstractState.LegalAction(gaction.TrainCardPickAction(False, None)),)
+
+
 State = TypeVar("State", bound=AbstractState)
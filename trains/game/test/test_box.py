@@ -1,6 +1,8 @@
+from typing import Optional
+
 import pytest
 
-from trains.game.box import Board, Box, City
+from trains.game.box import Board, Box, City, Color, Route, TrainCards
 
 
 @pytest.mark.parametrize(
@@ -11,6 +13,8 @@ from trains.game.box import Board, Box, City
         ("A", "C", Box.small([]).board, 1),
         ("A", "F", Box.small([]).board, 3),
         ("Las-Vegas", "El-Paso", Box.standard([]).board, 8),
+        ("A", "B", Board.make([("A", "B", None, 1), ("A", "B", None, 3)]), 1),
+        ("A", "B", Board.make([("A", "B", None, 3), ("A", "B", None, 1)]), 1),
     ],
 )
 def test_shortest_path(city_a: str, city_b: str, board: Board, expected: int):
@@ -18,3 +22,145 @@ def test_shortest_path(city_a: str, city_b: str, board: Board, expected: int):
     actual_reversed = board.shortest_path(City(city_b), City(city_a))
     assert actual == expected
     assert actual_reversed == expected
+
+
+@pytest.mark.parametrize(
+    "cards, other, expected",
+    [
+        (TrainCards(), TrainCards(), True),
+        (TrainCards({None: 1}), TrainCards(), False),
+        (TrainCards({Color("red"): 2}), TrainCards({Color("red"): 3}), True),
+        (TrainCards({Color("red"): 2}), TrainCards({Color("red"): 1}), False),
+        (
+            TrainCards({Color("red"): 1, None: 1}),
+            TrainCards({Color("red"): 1, Color("blue"): 4}),
+            False,
+        ),
+        (
+            TrainCards({Color("blue"): 1}),
+            TrainCards({Color("red"): 1, Color("blue"): 4}),
+            True,
+        ),
+    ],
+)
+def test_train_cards_issubset(cards: TrainCards, other: TrainCards, expected: bool):
+    assert cards.issubset(other) == expected
+
+
+@pytest.mark.parametrize(
+    "card, count, wildcards, expected",
+    [
+        (Color("red"), 2, 0, TrainCards({Color("red"): 2})),
+        (Color("red"), 2, 3, TrainCards({Color("red"): 2, None: 3})),
+        (None, 4, 0, TrainCards({None: 4})),
+        (None, 1, 2, TrainCards({None: 3})),
+    ],
+)
+def test_train_cards_of_card(
+    card: Optional[Color], count: int, wildcards: int, expected: TrainCards
+):
+    assert TrainCards.of_card(card, count, wildcards) == expected
+
+
+@pytest.mark.parametrize("length", [-1, 0, 1, 2, 3, 4, 6, 45])
+def test_routes_up_to_length(length: int):
+    board = Box.standard([]).board
+    assert board.routes_up_to_length(length) == tuple(
+        route for route in board.routes if route.length <= length
+    )
+
+
+def test_city_pairs():
+    board = Box.standard([]).board
+    assert set(board.city_pairs.values()) == board.cities_to_routes.keys()
+    for route in board.routes:
+        city_a, city_b = route.cities
+        assert board.city_pairs[(city_a, city_b)] == route.cities
+        assert board.city_pairs[(city_b, city_a)] == route.cities
+
+
+def test_cities_to_routes_by_color():
+    board = Box.standard([]).board
+    assert board.cities_to_routes_by_color.keys() == board.cities_to_routes.keys()
+    for cities, routes in board.cities_to_routes.items():
+        by_color = board.cities_to_routes_by_color[cities]
+        assert by_color.keys() == {route.color for route in routes}
+        for color, route in by_color.items():
+            assert route in routes
+            assert route.color == color
+
+
+def test_double_route_masks():
+    board = Box.standard([]).board
+    for route in board.routes:
+        assert board.double_route_masks[route.index] == sum(
+            1 << double.index for double in board.double_routes[route]
+        )
+
+
+def test_destination_card_mask():
+    box = Box.standard([])
+    assert box.destination_card_mask([]) == 0
+    assert box.destination_cards_of_mask(0) == frozenset()
+    assert (
+        box.destination_card_mask(box.destination_cards)
+        == (1 << len(box.destination_cards)) - 1
+    )
+    for card in box.destination_cards:
+        mask = box.destination_card_mask([card])
+        assert mask == box.destination_card_bits[card]
+        assert box.destination_cards_of_mask(mask) == frozenset([card])
+    cards = frozenset(box.destination_card_list[1::3])
+    assert box.destination_cards_of_mask(box.destination_card_mask(cards)) == cards
+
+
+def test_train_cards_from_counts_interned():
+    cards = TrainCards.from_counts([1, 2, 0])
+    assert cards is TrainCards.from_counts([1, 2])
+    assert cards.counts == (1, 2)
+    assert cards.total == 3
+
+
+@pytest.mark.parametrize(
+    "cards, other, expected",
+    [
+        (TrainCards(), TrainCards(), TrainCards()),
+        (TrainCards({None: 2}), TrainCards({None: 1}), TrainCards({None: 1})),
+        (
+            TrainCards({Color("red"): 2, None: 1}),
+            TrainCards({Color("red"): 3, Color("blue"): 1}),
+            TrainCards({None: 1}),
+        ),
+        (
+            TrainCards({Color("blue"): 4}),
+            TrainCards({Color("red"): 1, Color("blue"): 1}),
+            TrainCards({Color("blue"): 3}),
+        ),
+    ],
+)
+def test_train_cards_subtracting(
+    cards: TrainCards, other: TrainCards, expected: TrainCards
+):
+    assert cards.subtracting(other) == expected
+
+
+def test_board_requires_route_indices():
+    board = Box.small([]).board
+    a, c = City("A"), City("C")
+    with pytest.raises(ValueError, match="has index -1"):
+        Board(
+            cities=board.cities,
+            routes=board.routes,
+            double_routes=board.double_routes,
+            city_list=board.city_list,
+            route_list=(Route(frozenset([a, c]), Color("red"), 1),)
+            + board.route_list[1:],
+        )
+    with pytest.raises(ValueError, match="is at position 0"):
+        Board(
+            cities=board.cities,
+            routes=board.routes,
+            double_routes=board.double_routes,
+            city_list=board.city_list,
+            route_list=tuple(reversed(board.route_list)),
+        )
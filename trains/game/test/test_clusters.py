@@ -45,3 +45,27 @@ def test_connect():
     assert clusters.distance(B, E) == 0
     assert clusters.distance(A, E) == 0
     assert clusters.distance(C, F) == 0
+
+
+def test_get_cluster_for_city():
+    board = Box.small([]).board
+    clusters = Clusters(frozenset(), board.shortest_paths)
+    A = City("A")
+    B = City("B")
+    C = City("C")
+    D = City("D")
+
+    assert clusters.get_cluster_for_city(A) == frozenset([A])
+    assert not clusters.is_connected(frozenset([A, C]))
+
+    clusters = clusters.connect(A, C)
+    clusters = clusters.connect(B, D)
+    assert clusters.get_cluster_for_city(A) == frozenset([A, C])
+    assert clusters.get_cluster_for_city(D) == frozenset([B, D])
+    assert clusters.is_connected(frozenset([A, C]))
+    assert not clusters.is_connected(frozenset([A, D]))
+
+    clusters = clusters.connect(C, D)
+    assert clusters.clusters == frozenset([frozenset([A, B, C, D])])
+    assert clusters.get_cluster_for_city(B) == frozenset([A, B, C, D])
+    assert clusters.is_connected(frozenset([A, D]))
@@ -0,0 +1,118 @@
+from typing import List
+
+import pytest
+
+import trains.game.action as gaction
+import trains.game.turn as gturn
+from trains.game.box import Box, Player, City, TrainCards, frozendict
+from trains.game.observed_state import ObservedState, _enumerate_final_assignments
+from trains.util import fast_replace
+
+
+@pytest.mark.parametrize(
+    "counts, pile_mask, expected_count",
+    [
+        ([], 0b1111, 1),
+        ([0], 0b1111, 1),
+        ([0, 0], 0, 1),
+        ([1], 0b1111, 4),
+        ([2], 0b1111, 6),
+        ([1, 1], 0b1111, 12),
+        ([2, 1], 0b1111, 12),
+        ([2, 2], 0b1111, 6),
+        ([5], 0b1111, 0),
+        ([2, 3], 0b1111, 0),
+    ],
+)
+def test_enumerate_final_assignments(
+    counts: List[int], pile_mask: int, expected_count: int
+):
+    assignments = list(_enumerate_final_assignments(counts, pile_mask))
+    assert len(assignments) == expected_count
+    assert len(set(map(tuple, assignments))) == expected_count
+    for masks in assignments:
+        assert len(masks) == len(counts)
+        union = 0
+        for mask, count in zip(masks, counts):
+            assert bin(mask).count("1") == count
+            assert mask & ~pile_mask == 0
+            assert mask & union == 0
+            union |= mask
+
+
+def test_reveal_final_destination_cards_legal_actions():
+    me, b, c = Player("a"), Player("b"), Player("c")
+    box = Box.small([me, b, c])
+    cards_by_cities = {card.cities: card for card in box.destination_cards}
+    a_f = cards_by_cities[frozenset([City("A"), City("F")])]
+    a_e = cards_by_cities[frozenset([City("A"), City("E")])]
+    pile = box.destination_cards - {a_f, a_e}
+
+    state = ObservedState.make(box, me)
+    state = fast_replace(
+        state,
+        turn_state=gturn.RevealFinalDestinationCardsTurn.intern(),
+        hand=fast_replace(state.hand, destination_cards=frozenset([a_f])),
+        opponent_hands=frozendict(
+            {
+                b: fast_replace(
+                    state.opponent_hands[b],
+                    known_destination_cards=frozenset([a_e]),
+                    destination_cards_count=2,
+                ),
+                c: fast_replace(state.opponent_hands[c], destination_cards_count=1),
+            }
+        ),
+        destination_card_pile_distribution=pile,
+    )
+
+    actions = [legal_action.action for legal_action in state.legal_actions()]
+    # b draws one of the four pile cards and c one of the remaining three
+    assert len(actions) == 12
+    assert len(set(actions)) == 12
+    for action in actions:
+        assert isinstance(action, gaction.RevealFinalDestinationCardsAction)
+        cards = action.destination_cards
+        assert cards[me] == frozenset([a_f])
+        assert a_e in cards[b]
+        assert len(cards[b]) == 2
+        assert len(cards[c]) == 1
+        assert cards[b] - {a_e} <= pile
+        assert cards[c] <= pile
+        assert not cards[b] & cards[c]
+
+
+@pytest.mark.parametrize(
+    "action, second_draw",
+    [
+        (gaction.TrainCardPickAction(False, None), False),
+        (gaction.TrainCardPickAction(True, None), False),
+        (gaction.TrainCardPickAction(False, None), True),
+    ],
+)
+def test_train_card_draws_share_interned_turns(action, second_draw):
+    me, opponent = Player("a"), Player("b")
+    box = Box.small([me, opponent])
+    state = ObservedState.make(box, me)
+    if second_draw:
+        turn_state: gturn.TurnState = gturn.PlayerTrainCardDrawMidTurn.intern(
+            False, opponent
+        )
+        after_deal: gturn.TurnState = gturn.PlayerStartTurn.make_or_end(False, me)
+    else:
+        turn_state = gturn.PlayerStartTurn.make_or_end(False, opponent)
+        after_deal = (
+            gturn.PlayerStartTurn.make_or_end(False, me)
+            if action.draw_known
+            else gturn.PlayerTrainCardDrawMidTurn.intern(False, opponent)
+        )
+    state = fast_replace(
+        state,
+        turn_state=turn_state,
+        face_up_train_cards=TrainCards({None: 1}),
+    )
+
+    next_turn_state = state.next_state(action).turn_state
+    assert next_turn_state is gturn.TrainCardDealTurn.intern(
+        1, None if action.draw_known else opponent, after_deal
+    )
@@ -0,0 +1,140 @@
+from typing import Optional
+
+import pytest
+
+import trains.game.action as gaction
+from trains.error import ParserException
+from trains.game.box import Box, Player, City, Color, Route, TrainCards
+from trains.game.player_actor import UserActor
+from trains.util import fast_replace
+
+blue = Color("blue")
+red = Color("red")
+
+
+@pytest.fixture
+def actor() -> UserActor:
+    players = [Player("a"), Player("b")]
+    return UserActor.make(Box.small(players), players[0], print_state=False)
+
+
+def _route(
+    actor: UserActor, city_a: str, city_b: str, color: Optional[Color] = None
+) -> Route:
+    routes = actor.box.board.cities_to_routes[frozenset([City(city_a), City(city_b)])]
+    return next(route for route in routes if route.color == color)
+
+
+@pytest.mark.parametrize(
+    "action_str",
+    [
+        "build A C --color red",
+        "build A C --color=red",
+        "build --color red A C",
+        "build A C --wildcards 1",
+        "build A C --wildcards=1",
+    ],
+)
+def test_parse_build(actor: UserActor, action_str: str):
+    action = actor.parse_action(action_str)
+    assert isinstance(action, gaction.BuildAction)
+    assert action.route == _route(actor, "A", "C", red)
+    if "wildcards" in action_str:
+        assert action.train_cards == TrainCards({None: 1})
+    else:
+        assert action.train_cards == TrainCards({red: 1})
+
+
+def test_parse_build_colored_route_with_some_wildcards(actor: UserActor):
+    action = actor.parse_action("build A E --color blue --wildcards 1")
+    assert action == gaction.BuildAction(
+        _route(actor, "A", "E"), TrainCards({blue: 1, None: 1})
+    )
+
+
+@pytest.mark.parametrize(
+    "options, color, cost",
+    [
+        ("--double-color blue --color blue", blue, TrainCards({blue: 1})),
+        ("--double-color=blue --wildcards 1", blue, TrainCards({None: 1})),
+        ("--color red", None, TrainCards({red: 1})),
+        ("--double-color wildcard --color red", None, TrainCards({red: 1})),
+    ],
+)
+def test_parse_build_double_route(
+    actor: UserActor, options: str, color: Optional[Color], cost: TrainCards
+):
+    action = actor.parse_action(f"build C D {options}")
+    assert action == gaction.BuildAction(_route(actor, "C", "D", color), cost)
+
+
+def test_parse_build_gray_route_without_color(actor: UserActor):
+    with pytest.raises(ParserException, match="a color must be specified"):
+        actor.parse_action("build A E")
+    action = actor.parse_action("build A E --wildcards 2")
+    assert action == gaction.BuildAction(_route(actor, "A", "E"), TrainCards({None: 2}))
+
+
+@pytest.mark.parametrize(
+    "action_str, message",
+    [
+        ("", "Expected an action"),
+        ("fly A C", "Unexpected action 'fly'"),
+        ("build A C --colour red", "Unexpected option '--colour'"),
+        ("build A C --color", "Expected a value for option '--color'"),
+        ("build A C --wildcards two", "Invalid number of wildcards 'two'"),
+        ("build A C D --color red", "Expected the two cities"),
+        ("build A --color red", "Expected the two cities"),
+        ("build A F --color red", "No route from"),
+        ("build A Z --color red", "Invalid city 'Z'"),
+        ("build A C --color green", "Invalid color 'green'"),
+        ("build C D --double-color red --color red", "exists with red color"),
+        ("draw blue red", "Expected at most one color"),
+        ("draw --color blue", "Unexpected option '--color'"),
+        ("draw-destinations A", "Unexpected arguments 'A'"),
+        ("pass now", "Unexpected arguments 'now'"),
+        ("pick", "Expected at least one destination card"),
+        ("pick A,F", "No destination card from"),
+        ("pick A", "Expected two comma-separated cities"),
+    ],
+)
+def test_parse_errors(actor: UserActor, action_str: str, message: str):
+    with pytest.raises(ParserException, match=message):
+        actor.parse_action(action_str)
+
+
+@pytest.mark.parametrize(
+    "action_str, expected",
+    [
+        ("draw", gaction.TrainCardPickAction(False, None)),
+        ("draw blue", gaction.TrainCardPickAction(True, blue)),
+        ("draw wildcard", gaction.TrainCardPickAction(True, None)),
+        ("draw-destinations", gaction.DestinationCardPickAction()),
+        ("pass", gaction.PassAction()),
+    ],
+)
+def test_parse_simple_actions(
+    actor: UserActor, action_str: str, expected: gaction.Action
+):
+    assert actor.parse_action(action_str) == expected
+
+
+def test_parse_pick(actor: UserActor):
+    cards = {card.cities: card for card in actor.box.destination_cards}
+    a_f = cards[frozenset([City("A"), City("F")])]
+    c_d = cards[frozenset([City("C"), City("D")])]
+    state = actor.state
+    hand = fast_replace(
+        state.player_hand(actor.player),
+        unselected_destination_cards=frozenset([a_f, c_d]),
+    )
+    actor.state = fast_replace(state, hands=(hand,) + state.hands[1:])
+
+    assert actor.parse_action("pick F,A") == gaction.DestinationCardSelectionAction(
+        frozenset([a_f])
+    )
+    assert actor.parse_action("pick A,F C,D") == gaction.DestinationCardSelectionAction(
+        frozenset([a_f, c_d])
+    )
+    with pytest.raises(ParserException, match="No destination card from"):
+        actor.parse_action("pick A,E")
@@ -1,14 +1,41 @@
 from __future__ import annotations
 
+import functools
 from abc import ABC
 from dataclasses import dataclass
-from typing import Union, Optional
+from typing import Union, Optional, Any, Dict, Tuple, Type, TypeVar
 
 from trains.game.box import Player
 
+_T = TypeVar("_T")
+
+_MAX_INTERNED_TURNS = 10000
+_interned_turns: Dict[
+    Tuple[type, Tuple[Any, ...], Tuple[Tuple[str, Any], ...]], Any
+] = {}
+
+
+class InternedTurn:
+    """
+    A turn with an alternative constructor, intern, that hands out a shared instance
+    for equal arguments. Turns are immutable and only a few thousand distinct ones come
+    up in a game, so states can share them, making comparisons of equal turns identity
+    checks.
+    """
+
+    @classmethod
+    def intern(cls: Type[_T], *args: Any, **kwargs: Any) -> _T:
+        key = (cls, args, tuple(kwargs.items()))
+        turn = _interned_turns.get(key)
+        if turn is None:
+            turn = cls(*args, **kwargs)  # type: ignore
+            if len(_interned_turns) < _MAX_INTERNED_TURNS:
+                _interned_turns[key] = turn
+        return turn
+
 
 @dataclass(frozen=True)
-class PlayerTurn(ABC):
+class PlayerTurn(InternedTurn, ABC):
     """
     Represents a turn for a player to make
 
@@ -20,7 +47,7 @@ class PlayerTurn(ABC):
 
 
 @dataclass(frozen=True)
-class GameTurn(ABC):
+class GameTurn(InternedTurn, ABC):
     """
     Represents a turn for the game to make
     """
@@ -31,7 +58,7 @@ class GameTurn(ABC):
 
 
 @dataclass(frozen=True)
-class GameOverTurn:
+class GameOverTurn(InternedTurn):
     """
     Represents the game being over
     """
@@ -68,14 +95,19 @@ class PlayerStartTurn(PlayerTurn, RotatingTurn):
     Represents the start of a player's turn
     """
 
+    # every turn ends with this call, and it only has two results per player, so they
+    # are looked up directly rather than by building the intern key each time
     @staticmethod
+    @functools.lru_cache(maxsize=2 ** 10)
     def make_or_end(
         last_turn_started: bool, player: Player
     ) -> Union[PlayerStartTurn, RevealFinalDestinationCardsTurn]:
         if last_turn_started:
-            return RevealFinalDestinationCardsTurn()
+            return RevealFinalDestinationCardsTurn.intern()
         else:
-            return PlayerStartTurn(last_turn_started=last_turn_started, player=player)
+            return PlayerStartTurn.intern(
+                last_turn_started=last_turn_started, player=player
+            )
 
 
 @dataclass(frozen=True)
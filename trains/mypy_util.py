@@ -43,7 +43,14 @@ def add_slots(cls: Type[_T]) -> Type[_T]:
     # Create a new dict for our new class.
     cls_dict = dict(cls.__dict__)
     field_names = tuple(f.name for f in dataclasses.fields(cls))
-    cls_dict["__slots__"] = field_names
+    # Fields inherited from a base class that already has slots for them don't need
+    #  another slot.
+    inherited_slots = {
+        name for base in cls.__mro__[1:] for name in base.__dict__.get("__slots__", ())
+    }
+    cls_dict["__slots__"] = tuple(
+        name for name in field_names if name not in inherited_slots
+    )
     for field_name in field_names:
         # Remove our attributes, if present. They'll still be
         #  available in _MARKER.
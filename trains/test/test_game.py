@@ -1,4 +1,4 @@
-from typing import Callable, List, Tuple
+from typing import Callable, List, Tuple, Type
 
 import pytest
 
@@ -8,6 +8,7 @@ from trains.game.box import Box, Player
 from trains.game.game_actor import SimulatedGameActor
 from trains.game.known_state import KnownState
 from trains.game.observed_state import ObservedState
+from trains.game.state import AbstractState
 from trains.game.turn import TurnState, RotatingTurn
 
 
@@ -113,7 +114,7 @@ def test_gameplay_known(
             assert player.state.discarded_train_cards == game.discarded_train_cards
             assert player.state.built_routes == game.built_routes
 
-            for p, hand in player.state.hands.items():
+            for p, hand in player.state.player_hands.items():
                 assert hand.destination_cards == game.player_hands[p].destination_cards
                 assert (
                     hand.unselected_destination_cards
@@ -135,3 +136,19 @@ def test_gameplay_known(
         history.append((game.turn_state, action))
         for actor in actors:
             actor.observe_action(action)
+
+
+@pytest.mark.parametrize("state_type", [KnownState, ObservedState])
+def test_clear_caches(state_type: Type[AbstractState]):
+    players = [Player("1"), Player("2")]
+    box = Box.small(players)
+    state = state_type.make(box, players[0])
+    action = SimulatedGameActor.make(box).get_action()
+    next_state = state.next_state(action)
+    assert state.next_state(action) is next_state
+
+    state_type.clear_caches()
+    # once cleared, the successor is computed again rather than looked up
+    recomputed = state.next_state(action)
+    assert recomputed is not next_state
+    assert recomputed == next_state
@@ -1,15 +1,20 @@
+import dataclasses
 from typing import Optional, Tuple, Collection
 
 import pytest
 
-from trains.game.box import TrainCards, Color, City, Route, Box
+from trains.game.box import TrainCards, Color, City, Route, Box, frozendict
 from trains.game.clusters import Clusters
+from trains.game.state import KnownHandState
 from trains.util import (
     probability_of_having_cards,
     subtract_train_cards,
     best_routes_between_cities,
     best_routes_between_many_cities,
     cards_needed_to_build_routes,
+    frozendict_set,
+    destination_cards_value,
+    fast_replace,
 )
 
 blue = Color("blue")
@@ -21,6 +26,7 @@ wild = None
     "cards, hand_size, pile_distribution, expected",
     [
         (TrainCards(), 0, TrainCards(), 1),
+        (TrainCards({blue: 1}), 0, TrainCards({blue: 1}), 0),
         (TrainCards({blue: 1}), 1, TrainCards({blue: 1}), 1),
         (TrainCards({blue: 1}), 1, TrainCards({blue: 1, red: 1}), 0.5),
         (TrainCards({blue: 1}), 2, TrainCards({blue: 1, red: 1}), 1),
@@ -142,6 +148,51 @@ def test_subtract_train_cards(
     assert actual_leftovers == expected_leftovers
 
 
+def test_frozendict_set():
+    original = frozendict({"a": 1, "b": 2})
+    assert frozendict_set(original, "b", 3) == frozendict({"a": 1, "b": 3})
+    assert frozendict_set(original, "c", 3) == frozendict({"a": 1, "b": 2, "c": 3})
+    assert original == frozendict({"a": 1, "b": 2})
+
+
+def test_destination_cards_value():
+    cards = list(Box.standard([]).destination_cards)[:3]
+    assert destination_cards_value([]) == 0
+    assert (
+        destination_cards_value(cards)
+        == cards[0].value + cards[1].value + cards[2].value
+    )
+
+
+def test_fast_replace():
+    box = Box.standard([])
+    hand = KnownHandState(
+        destination_cards=frozenset(),
+        unselected_destination_cards=frozenset(box.destination_card_list[:3]),
+        train_cards=TrainCards({red: 2}),
+        remaining_trains=45,
+        points_so_far=0,
+        complete_destination_cards=frozenset(),
+        incomplete_destination_cards=frozenset(),
+    )
+    hash(hand)
+    assert len(hand.cities_to_card) == 3
+
+    replaced = fast_replace(hand, train_cards=TrainCards({blue: 1}), points_so_far=4)
+    # the memoized values start over, as __post_init__ is still called
+    assert replaced._hash_cached is None
+    assert replaced._cities_to_card_cached is None
+    assert replaced.unselected_destination_cards is hand.unselected_destination_cards
+    expected = dataclasses.replace(
+        hand, train_cards=TrainCards({blue: 1}), points_so_far=4
+    )
+    assert replaced == expected
+    assert hash(replaced) == hash(expected)
+
+    with pytest.raises(TypeError):
+        fast_replace(hand, not_a_field=1)
+
+
 small_box = Box.small([])
 
 
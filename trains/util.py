@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import heapq
+import itertools
+import operator
 import random
 from collections import defaultdict
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import (
+    Any,
+    Callable,
     Tuple,
     TypeVar,
     Generic,
@@ -17,9 +21,12 @@ from typing import (
     Collection,
     List,
     Set,
+    Mapping,
 )
 
-from trains.game.box import TrainCards, Route, TrainCard, City, Box
+from frozendict import frozendict
+
+from trains.game.box import TrainCards, Route, TrainCard, City, Box, DestinationCard
 from trains.game.clusters import Clusters
 from trains.mypy_util import cache, add_slots
 
@@ -28,20 +35,17 @@ def sufficient_cards_to_build(
     route: Route, cards: TrainCards, unknown_cards: int = 0
 ) -> bool:
     if route.color is None:
-        max_color_card_set = max(
-            (count for color, count in cards.items() if color is not None), default=0
-        )
+        # wildcards have index 0, so the rest of the counts are the colored cards
+        max_color_card_set = max(cards.counts[1:], default=0)
         return cards[None] + max_color_card_set + unknown_cards >= route.length
     else:
         return cards[None] + cards[route.color] + unknown_cards >= route.length
 
 
 def merge_train_cards(*cards: TrainCards) -> TrainCards:
-    result_cards: DefaultDict[TrainCard, int] = defaultdict(int)
-    for card_set in cards:
-        for color, count in card_set.items():
-            result_cards[color] += count
-    return TrainCards(result_cards)
+    return TrainCards.from_counts(
+        map(sum, itertools.zip_longest(*(c.counts for c in cards), fillvalue=0))
+    )
 
 
 def subtract_train_cards(
@@ -51,15 +55,25 @@ def subtract_train_cards(
     Subtract the second set of train cards from the first set. Return (the resultant
     cards, the leftover cards)
     """
-    new_cards: Dict[TrainCard, int] = {}
-    extras: Dict[TrainCard, int] = {}
-    for color in original.keys() | minus.keys():
-        diff = original[color] - minus[color]
-        if diff > 0:
-            new_cards[color] = diff
-        elif diff < 0:
-            extras[color] = -diff
-    return TrainCards(new_cards), TrainCards(extras)
+    diffs = [
+        a - b
+        for a, b in itertools.zip_longest(original.counts, minus.counts, fillvalue=0)
+    ]
+    return (
+        TrainCards.from_counts(max(diff, 0) for diff in diffs),
+        TrainCards.from_counts(max(-diff, 0) for diff in diffs),
+    )
+
+
+_destination_card_value = operator.attrgetter("value")
+
+
+def destination_cards_value(cards: Iterable[DestinationCard]) -> int:
+    """
+    The total points of the given destination cards
+    """
+    # mapping attrgetter avoids running a generator frame per card
+    return sum(map(_destination_card_value, cards))
 
 
 def probability_of_having_cards(
@@ -69,9 +83,20 @@ def probability_of_having_cards(
     Returns the probability that the given cards are located inside a hand of the
     specified size, with the given distribution.
     """
-
-    needed_cards = tuple(cards.values())
-    favorables = tuple(pile_distribution[color] for color in cards.keys())
+    if hand_size == 0:
+        # nothing can be in an empty hand, which is how the legal actions of a known
+        # hand are scored, so skip building the arguments for the memoized helper
+        return 1 if cards.total == 0 else 0
+
+    # the arguments are read straight off the counts (in the order cards iterates in),
+    # rather than through the Mapping views, which look each card up again
+    pile_counts = pile_distribution.counts
+    needed_cards = tuple(count for count in cards.counts if count)
+    favorables = tuple(
+        pile_counts[index] if index < len(pile_counts) else 0
+        for index, count in enumerate(cards.counts)
+        if count
+    )
     total_favorables = sum(favorables)
     total_unfavorables = pile_distribution.total - total_favorables
 
@@ -138,6 +163,8 @@ def _probability_of_having_cards_helper(
 
 
 _T = TypeVar("_T")
+_K = TypeVar("_K")
+_V = TypeVar("_V")
 
 
 @add_slots
@@ -160,6 +187,16 @@ class Cons(Generic[_T]):
             l = l.rest
 
 
+def frozendict_set(mapping: Mapping[_K, _V], key: _K, value: _V) -> frozendict[_K, _V]:
+    """
+    Make a copy of the mapping with key set to value. This copies the mapping only
+    once, where unpacking it into a new dict literal first would copy it twice.
+    """
+    items = dict(mapping)
+    items[key] = value
+    return frozendict(items)
+
+
 def randomly_sample_distribution(
     iterable: Iterable[Tuple[_T, float]], sample_size: int = 1
 ) -> Generator[_T, None, None]:
@@ -351,3 +388,32 @@ def cards_needed_to_build_routes(
 
     needed_cards = max(needed_cards - cards_in_hand[None], 0)
     return needed_cards
+
+
+@cache
+def _replace_plan(cls: type) -> Tuple[Tuple[str, ...], Optional[Callable[[Any], None]]]:
+    return (
+        tuple(f.name for f in fields(cls) if f.init),
+        getattr(cls, "__post_init__", None),
+    )
+
+
+def fast_replace(obj: _T, **changes: Any) -> _T:
+    """
+    A quicker dataclasses.replace, used by the state transitions to make the next
+    states and hands. The fields are copied onto a new object directly instead of
+    going through __init__, so InitVars aren't supported, but __post_init__ is still
+    called.
+    """
+    cls = type(obj)
+    field_names, post_init = _replace_plan(cls)
+    new = object.__new__(cls)
+    for name in field_names:
+        object.__setattr__(
+            new, name, changes.pop(name) if name in changes else getattr(obj, name)
+        )
+    if changes:
+        raise TypeError(f"{cls.__name__} has no fields {', '.join(changes)}")
+    if post_init is not None:
+        post_init(new)
+    return new